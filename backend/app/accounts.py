@@ -0,0 +1,59 @@
+"""Account lifecycle operations shared by the user and admin routes.
+
+Dependent rows are removed by the database: every foreign key on the path from
+`users` (provider profile, bookings, reviews, complaints, provider_slots) is
+declared ON DELETE CASCADE, so deleting an account is one DELETE statement.
+"""
+from sqlalchemy import delete, update, select, func, case, or_, and_
+from sqlalchemy.orm import Session
+
+try:
+    from .models import User, Provider, Booking, Review, average_rating
+    from . import stats
+except (ImportError, ValueError):
+    from models import User, Provider, Booking, Review, average_rating
+    import stats
+
+
+def _subtract_reviews(db: Session, review_filter) -> None:
+    """Take the reviews matching `review_filter` out of their providers' rating aggregates.
+
+    One grouped UPDATE; the rating is recomputed like routes/reviews.create_review
+    does, and drops to 0 when a provider has no reviews left.
+    """
+    removed = (
+        select(Review.provider_id, func.sum(Review.rating).label("total"), func.count(Review.id).label("count"))
+        .where(review_filter)
+        .group_by(Review.provider_id)
+        .subquery()
+    )
+    new_sum = func.coalesce(Provider.rating_sum, 0) - removed.c.total
+    new_count = func.coalesce(Provider.rating_count, 0) - removed.c.count
+    db.execute(
+        update(Provider).where(Provider.id == removed.c.provider_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=case((new_count > 0, average_rating(new_sum, new_count)), else_=0.0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def delete_user(db: Session, user: User) -> None:
+    """Delete `user` and everything hanging off it, in the caller's transaction."""
+    provider = db.query(Provider).filter(Provider.user_id == user.id).first()
+    # Keep dashboard and per-provider counters in step with everything the cascade removes
+    booking_filter = Booking.customer_id == user.id
+    if provider:
+        booking_filter = or_(booking_filter, Booking.provider_id == provider.id)
+    stats.user_deleted(db, user, provider, booking_filter)
+
+    # Reviews go with their author and with the bookings; the deleted provider's own
+    # aggregates go with its row
+    review_filter = or_(Review.customer_id == user.id, Review.booking_id.in_(select(Booking.id).where(booking_filter)))
+    if provider:
+        review_filter = and_(review_filter, Review.provider_id != provider.id)
+    _subtract_reviews(db, review_filter)
+
+    db.execute(delete(User).where(User.id == user.id).execution_options(synchronize_session=False))
@@ -0,0 +1,268 @@
+"""Static frontend: fingerprinting build step and cache-aware file responses.
+
+Run the build at deploy time (it only needs the standard library; brotli
+variants are added when the optional `brotli` package is installed). On Vercel
+it is the `buildCommand` in vercel.json:
+
+    python -m backend.app.assets build
+
+It copies `static/` to `static_dist/`, renames every css/js/asset file to
+`name.<content hash>.ext`, rewrites the references in HTML and CSS, writes
+.gz/.br siblings for text files and records everything in `manifest.json`.
+When that manifest exists the app serves `static_dist/`: fingerprinted files
+as `Cache-Control: immutable`, pages as `no-cache`, both with strong ETags and
+304 revalidation. Without a build it serves `static/` directly with weak,
+stat-based ETags, which is what local development wants.
+
+Either way the served directory is indexed once at startup (`route_table`):
+requests resolve with a dict lookup and never stat the disk, so files added
+after startup need a restart.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import mimetypes
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+from urllib.parse import quote, unquote
+
+try:
+    from fastapi import Request
+    from fastapi.responses import FileResponse, Response
+except ImportError:
+    # The deploy-time build runs before the app's requirements are installed
+    Request = FileResponse = Response = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_SOURCE = Path(__file__).parent / "static"
+STATIC_BUILD = Path(__file__).parent / "static_dist"
+MANIFEST_NAME = "manifest.json"
+
+FINGERPRINTED_DIRS = ("css", "js", "assets")
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".json", ".svg", ".txt", ".xml"}
+# Smaller files gain nothing from a compressed variant
+MIN_COMPRESS_BYTES = 512
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# "css/x.css?v=2", "/js/app.js", "static/assets/house%20cleaning.jpg" inside quotes or url(...)
+_REFERENCE = re.compile(r"""(?P<open>["'(])(?P<prefix>/?(?:static/)?)(?P<path>(?:css|js|assets)/[^"'()?#\s]+)(?:\?[^"'()#\s]*)?""")
+
+
+# --- Build ---
+
+def _fingerprint(rel: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    path = Path(rel)
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix())
+
+
+def _rewrite(text: str, renamed: Dict[str, str]) -> str:
+    def replace(match):
+        hashed = renamed.get(unquote(match.group("path")))
+        if hashed is None:
+            return match.group(0)
+        return match.group("open") + match.group("prefix") + quote(hashed)
+    return _REFERENCE.sub(replace, text)
+
+
+def _compress(target: Path) -> list:
+    data = target.read_bytes()
+    if target.suffix not in COMPRESSIBLE_SUFFIXES or len(data) < MIN_COMPRESS_BYTES:
+        return []
+    encodings = []
+    if brotli is not None:
+        target.with_name(target.name + ".br").write_bytes(brotli.compress(data, quality=11))
+        encodings.append("br")
+    target.with_name(target.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append("gzip")
+    return encodings
+
+
+def build(source: Path = STATIC_SOURCE, out: Path = STATIC_BUILD) -> dict:
+    """Fingerprint, rewrite and precompress `source` into `out`; returns the manifest."""
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    files = sorted(p for p in source.rglob("*") if p.is_file())
+    rel = {p: p.relative_to(source).as_posix() for p in files}
+    fingerprinted = [p for p in files if rel[p].split("/")[0] in FINGERPRINTED_DIRS]
+
+    # Assets first, CSS last: a stylesheet's hash must cover its rewritten url(...) references
+    renamed = {}
+    for path in sorted(fingerprinted, key=lambda p: p.suffix == ".css"):
+        data = path.read_bytes()
+        if path.suffix == ".css":
+            data = _rewrite(data.decode("utf-8"), renamed).encode("utf-8")
+        renamed[rel[path]] = _fingerprint(rel[path], data)
+        # The plain name stays available (revalidated, not immutable) for anything not rewritten
+        for name in (renamed[rel[path]], rel[path]):
+            target = out / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+
+    for path in files:
+        if path in fingerprinted:
+            continue
+        target = out / rel[path]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".html":
+            target.write_text(_rewrite(path.read_text(encoding="utf-8"), renamed), encoding="utf-8")
+        else:
+            shutil.copyfile(path, target)
+
+    entries = {}
+    for target in sorted(p for p in out.rglob("*") if p.is_file()):
+        name = target.relative_to(out).as_posix()
+        entries[name] = {
+            "etag": '"' + hashlib.sha256(target.read_bytes()).hexdigest()[:16] + '"',
+            "immutable": name in renamed.values(),
+            "encodings": _compress(target),
+        }
+
+    manifest = {"assets": renamed, "files": entries}
+    (out / MANIFEST_NAME).write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    return manifest
+
+
+# --- Serving ---
+
+class StaticFile(NamedTuple):
+    path: Path
+    size: int
+    mtime: float
+    etag: str
+    content_type: str
+    cache_control: str
+    # encoding -> (precompressed file, its stat), e.g. {"gzip": (Path("x.js.gz"), stat)}
+    variants: Mapping[str, Tuple[Path, os.stat_result]]
+    stat: os.stat_result
+
+
+def load() -> Tuple[Path, dict]:
+    """The directory to serve and its manifest ({} when serving the unbuilt source)."""
+    manifest_path = STATIC_BUILD / MANIFEST_NAME
+    if manifest_path.is_file():
+        return STATIC_BUILD, json.loads(manifest_path.read_text(encoding="utf-8"))
+    return STATIC_SOURCE, {}
+
+
+def route_table(root: Path, manifest: dict) -> Mapping[str, StaticFile]:
+    """Index `root` once: every URL path a file answers to -> its metadata.
+
+    A file answers to its relative path and the same path under static/; pages
+    also answer to their clean URL (no .html), and index.html to "" as well.
+    """
+    described = manifest.get("files", {})
+    skip = {MANIFEST_NAME} if described else set()
+    table = {}
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        rel = path.relative_to(root).as_posix()
+        if rel in skip or (described and rel not in described):
+            continue  # the manifest itself and the .gz/.br siblings
+        stat = path.stat()
+        entry = described.get(rel)
+        if entry:
+            etag = entry["etag"]
+            cache_control = IMMUTABLE if entry["immutable"] else REVALIDATE
+            variants = {}
+            for encoding in entry["encodings"]:
+                variant = path.with_name(path.name + (".br" if encoding == "br" else ".gz"))
+                variants[encoding] = (variant, variant.stat())
+        else:
+            etag = f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            cache_control = REVALIDATE
+            variants = {}
+        static_file = StaticFile(
+            path=path,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            etag=etag,
+            content_type=mimetypes.guess_type(rel)[0] or "application/octet-stream",
+            cache_control=cache_control,
+            variants=MappingProxyType(variants),
+            stat=stat,
+        )
+        table[rel] = table["static/" + rel] = static_file
+
+    # Clean URLs last, so that a real file of the same name wins
+    for rel, static_file in list(table.items()):
+        if rel.endswith(".html") and not rel.startswith("static/"):
+            for clean in ([rel[:-len(".html")], ""] if rel == "index.html" else [rel[:-len(".html")]]):
+                table.setdefault(clean, static_file)
+                table.setdefault("static/" + clean, static_file)
+    return MappingProxyType(table)
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in (_opaque(tag) for tag in header.split(","))
+
+
+def _encoding(request: Request, available) -> Optional[str]:
+    offered = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        offered.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and encoding in offered:
+            return encoding
+    return None
+
+
+def file_response(request: Request, static_file: StaticFile) -> Response:
+    """Serve an indexed file with cache headers, ETag/304 and precompressed variants."""
+    headers = {"ETag": static_file.etag, "Cache-Control": static_file.cache_control, "Vary": "Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match"), static_file.etag):
+        return Response(status_code=304, headers=headers)
+
+    path, stat = static_file.path, static_file.stat
+    encoding = _encoding(request, static_file.variants)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        path, stat = static_file.variants[encoding]
+    return FileResponse(str(path), media_type=static_file.content_type, headers=headers, stat_result=stat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Static asset pipeline")
+    parser.add_argument("command", choices=["build"])
+    args = parser.parse_args(argv)
+
+    manifest = build()
+    compressed = sum(1 for entry in manifest["files"].values() if entry["encodings"])
+    print(f"ASSETS: {len(manifest['assets'])} fingerprinted, {len(manifest['files'])} files, "
+          f"{compressed} precompressed ({'gzip + brotli' if brotli else 'gzip only; pip install brotli for .br'})")
+    print(f"ASSETS: wrote {STATIC_BUILD}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
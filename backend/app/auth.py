@@ -1,37 +1,31 @@
 # app/auth.py
-import json
-import hmac
-import hashlib
-import base64
+import os
 import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
 try:
     from .database import get_db
     from .models import User
+    from .tokens import codec as token_codec, TokenExpired
+    from .passwords import pwd_context, hash_password, verify_password as _verify_password
 except (ImportError, ValueError):
     from database import get_db
     from models import User
+    from tokens import codec as token_codec, TokenExpired
+    from passwords import pwd_context, hash_password, verify_password as _verify_password
 
-# Secret key for signing (in a real app, this should be in .env)
-SECRET_KEY = "my_super_secret_key_for_this_project_123"
+# Token signing keys come from the environment (JWT_KEYS / JWT_ACTIVE_KID); see tokens.py
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256", "bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/token")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/users/token", auto_error=False)
 
-def base64_url_encode(data: bytes) -> str:
-    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('utf-8')
-
-def base64_url_decode(data: str) -> bytes:
-    padding = '=' * (4 - (len(data) % 4))
-    return base64.urlsafe_b64decode(data + padding)
-
 def create_access_token(data: dict, expires_delta: Optional[int] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -40,56 +34,118 @@ def create_access_token(data: dict, expires_delta: Optional[int] = None) -> str:
         expire = time.time() + 24 * 3600 # 24 hours default
     
     to_encode.update({"exp": expire})
-    
-    # 1. Header
-    header = {"alg": "HS256", "typ": "JWT"}
-    header_json = json.dumps(header).encode('utf-8')
-    header_b64 = base64_url_encode(header_json)
-    
-    # 2. Payload
-    payload_json = json.dumps(to_encode).encode('utf-8')
-    payload_b64 = base64_url_encode(payload_json)
-    
-    # 3. Signature
-    signature_input = f"{header_b64}.{payload_b64}".encode('utf-8')
-    signature = hmac.new(SECRET_KEY.encode('utf-8'), signature_input, hashlib.sha256).digest()
-    signature_b64 = base64_url_encode(signature)
-    
-    return f"{header_b64}.{payload_b64}.{signature_b64}"
+    return token_codec.encode(to_encode)
 
 def verify_token(token: str):
     try:
-        parts = token.split('.')
-        if len(parts) != 3:
-             raise HTTPException(status_code=401, detail="Invalid token format")
-        
-        header_b64, payload_b64, signature_b64 = parts
-        
-        # Verify signature
-        signature_input = f"{header_b64}.{payload_b64}".encode('utf-8')
-        expected_signature = hmac.new(SECRET_KEY.encode('utf-8'), signature_input, hashlib.sha256).digest()
-        expected_signature_b64 = base64_url_encode(expected_signature)
-        
-        if not hmac.compare_digest(signature_b64, expected_signature_b64):
-             raise HTTPException(status_code=401, detail="Invalid token signature")
-             
-        # Decode payload
-        payload_json = base64_url_decode(payload_b64).decode('utf-8')
-        payload = json.loads(payload_json)
-        
-        # Check expiration
-        if "exp" in payload and payload["exp"] < time.time():
-             raise HTTPException(status_code=401, detail="Token expired")
-             
-        return payload
+        return token_codec.decode(token)
+    except TokenExpired:
+        raise HTTPException(status_code=401, detail="Token expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as far as authorization checks need to know."""
+    id: int
+    email: str
+    role: str
+    name: Optional[str] = None
+
+
+class PrincipalCache:
+    """Small thread-safe LRU of resolved principals with a per-entry TTL.
+
+    In-process only: other instances see an update or delete once their entry
+    expires, so keep PRINCIPAL_CACHE_TTL short.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, key, principal: Principal):
+        with self._lock:
+            self._entries[key] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            stale = [k for k, (p, _) in self._entries.items() if p.id == user_id]
+            for k in stale:
+                del self._entries[k]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    maxsize=int(os.environ.get("PRINCIPAL_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("PRINCIPAL_CACHE_TTL", "300")),
+)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop cached principals for a user; call after changing or deleting the account."""
+    principal_cache.invalidate_user(user_id)
+
+
+def create_user_token(user: User, expires_delta: Optional[int] = None) -> str:
+    # Tokens carry id and role so requests can be authorized without a users lookup
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "role": user.role},
+        expires_delta=expires_delta,
+    )
+
+
+def resolve_principal(payload: dict, db: Session) -> Optional[Principal]:
+    """Map verified token claims to a Principal, hitting the users table only on a cache miss."""
+    uid = payload.get("uid")
+    email = payload.get("sub")
+    if uid is not None:
+        key = ("uid", uid)
+    elif email is not None:
+        key = ("email", email)  # tokens issued before ids were embedded
+    else:
+        return None
+
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    if uid is not None:
+        row = db.query(User.id, User.email, User.role, User.name).filter(User.id == uid).first()
+    else:
+        row = db.query(User.id, User.email, User.role, User.name).filter(User.email == email).first()
+    if row is None:
+        return None
+
+    principal = Principal(id=row.id, email=row.email, role=row.role, name=row.name)
+    principal_cache.put(key, principal)
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     try:
         payload = verify_token(token)
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("uid") is None and payload.get("sub") is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     except HTTPException:
          raise
@@ -100,26 +156,24 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
         
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    principal = resolve_principal(payload, db)
+    if principal is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return principal
 
-def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> Optional[User]:
+def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)) -> Optional[Principal]:
     if not token:
         return None
         
     try:
         payload = verify_token(token)
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return db.query(User).filter(User.email == email).first()
+        return resolve_principal(payload, db)
     except Exception:
         return None
 
 def generate_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    # Hash cost and offloading live in passwords.py
+    return hash_password(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _verify_password(plain_password, hashed_password)
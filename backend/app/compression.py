@@ -0,0 +1,236 @@
+"""Negotiated gzip / brotli compression for API responses.
+
+`CompressionMiddleware` compresses responses whose content type is on the
+allowlist and whose body reaches COMPRESSION_MIN_BYTES, picking brotli when the
+client accepts it and the `brotli` package (listed in requirements) imports,
+gzip otherwise. Streaming responses (the CSV / NDJSON exports) are compressed
+incrementally. Responses that already carry a Content-Encoding (the
+precompressed static files) pass through untouched.
+
+Settings come from the environment:
+    COMPRESSION_MIN_BYTES   smallest body worth compressing (default 1024)
+    COMPRESSION_GZIP_LEVEL  1-9 (default 6)
+    COMPRESSION_BROTLI_QUALITY  0-11 (default 4; higher costs a lot more CPU)
+    COMPRESSION_TYPES       comma-separated content types to compress
+"""
+import os
+import time
+import zlib
+import threading
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_TYPES = tuple(
+    t.strip().lower() for t in os.environ.get(
+        "COMPRESSION_TYPES",
+        "application/json,application/x-ndjson,text/csv,text/html,text/css,text/plain,application/javascript,image/svg+xml",
+    ).split(",") if t.strip()
+)
+
+
+class _CompressionMetrics:
+    """Process-wide counters for what the middleware compressed and what it saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.compressed = {"br": 0, "gzip": 0}
+            self.skipped_small = 0
+            self.skipped_type = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.compress_ms = 0.0
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, elapsed_ms: float):
+        with self._lock:
+            self.compressed[encoding] += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.compress_ms += elapsed_ms
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count = sum(self.compressed.values())
+            return {
+                "compressed": dict(self.compressed),
+                "skipped_small": self.skipped_small,
+                "skipped_type": self.skipped_type,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+                "compress_ms_total": round(self.compress_ms, 3),
+                "compress_ms_avg": round(self.compress_ms / count, 3) if count else 0.0,
+            }
+
+
+compression_metrics = _CompressionMetrics()
+
+
+def get_compression_status() -> dict:
+    """Compression settings and running totals for diagnostics."""
+    return {
+        "min_bytes": COMPRESSION_MIN_BYTES,
+        "gzip_level": COMPRESSION_GZIP_LEVEL,
+        "brotli_quality": COMPRESSION_BROTLI_QUALITY if brotli else None,
+        "types": list(COMPRESSION_TYPES),
+        **compression_metrics.snapshot(),
+    }
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br or gzip, whichever the client accepts (q > 0) and we can produce, brotli first."""
+    offered = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        offered.add(name.strip().lower())
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, content_types=COMPRESSION_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, encoding, send).run(scope, receive)
+
+
+class _CompressedResponse:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+        self.compressor = None  # set once we've decided to compress
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.elapsed = 0.0
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.handle)
+
+    def _eligible(self, headers) -> bool:
+        if any(name.lower() == b"content-encoding" for name, _ in headers):
+            return False
+        content_type = next((value for name, value in headers if name.lower() == b"content-type"), b"")
+        content_type = content_type.decode("latin-1").split(";")[0].strip().lower()
+        if content_type not in self.middleware.content_types:
+            compression_metrics.incr("skipped_type")
+            return False
+        return True
+
+    def _headers(self, content_length: Optional[int]):
+        headers = [(n, v) for n, v in self.start.get("headers", []) if n.lower() not in (b"content-length", b"vary")]
+        vary = [v for n, v in self.start.get("headers", []) if n.lower() == b"vary"]
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"]) if vary else b"Accept-Encoding"))
+        if self.compressor is not None:
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return headers
+
+    def _compress(self, data: bytes, finish: bool) -> bytes:
+        began = time.perf_counter()
+        out = self.compressor.compress(data)
+        if finish:
+            out += self.compressor.flush()
+        self.elapsed += (time.perf_counter() - began) * 1000
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        return out
+
+    async def handle(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            status = message["status"]
+            self.passthrough = status < 200 or status in (204, 304) or not self._eligible(message.get("headers", []))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and not more_body:
+            # The whole body in one message: compress only if it is worth it
+            if len(body) < self.middleware.minimum_size:
+                compression_metrics.incr("skipped_small")
+                await self.send({**self.start, "headers": self._headers(len(body))})
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            data = self._compress(body, finish=True)
+            await self.send({**self.start, "headers": self._headers(len(data))})
+            await self.send({"type": "http.response.body", "body": data})
+            compression_metrics.record(self.encoding, self.bytes_in, self.bytes_out, self.elapsed)
+            return
+
+        if self.compressor is None:
+            # Streaming body: length unknown up front, compress chunk by chunk
+            self.compressor = _Compressor(self.encoding)
+            await self.send({**self.start, "headers": self._headers(None)})
+
+        data = self._compress(body, finish=not more_body)
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+        if not more_body:
+            compression_metrics.record(self.encoding, self.bytes_in, self.bytes_out, self.elapsed)
@@ -1,5 +1,10 @@
 import os
-from sqlalchemy import create_engine
+import time
+import threading
+from uuid import uuid4
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool, NullPool
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # CRITICAL: PRODUCTION DATABASE CONFIGURATION
@@ -30,7 +35,147 @@ try:
 except Exception:
     pass # Fallback to original if parsing fails
 
-engine = create_engine(DATABASE_URL)
+# CONNECTION POOL CONFIGURATION
+# --------------------------------------------
+# DB_POOL_MODE=pooled (default): a QueuePool per process, tuned with the variables below.
+# DB_POOL_MODE=serverless: NullPool, one connection per checkout, closed on release.
+#   Use this on Vercel together with an external pooler (PgBouncer / Neon / Supabase
+#   pooler URL) so that many short-lived lambda instances don't each hold a pool open
+#   against Postgres.
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "pooled").strip().lower()
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").strip().lower() in ("1", "true", "yes")
+# DB_POOL_SIZE / DB_MAX_OVERFLOW are the per-process budget for BOTH engines: the
+# async (asyncpg) engine takes this share of it and the sync engine the rest.
+DB_ASYNC_POOL_SIZE = int(os.environ.get("DB_ASYNC_POOL_SIZE", str(DB_POOL_SIZE // 2)))
+DB_ASYNC_MAX_OVERFLOW = int(os.environ.get("DB_ASYNC_MAX_OVERFLOW", str(DB_MAX_OVERFLOW // 2)))
+SYNC_POOL_SIZE = DB_POOL_SIZE - DB_ASYNC_POOL_SIZE
+SYNC_MAX_OVERFLOW = DB_MAX_OVERFLOW - DB_ASYNC_MAX_OVERFLOW
+
+if DB_POOL_MODE not in ("pooled", "serverless"):
+    raise ValueError(f"FATAL: DB_POOL_MODE must be 'pooled' or 'serverless', got '{DB_POOL_MODE}'.")
+# pool_size=0 would mean "no limit" to SQLAlchemy, so each engine needs at least one
+if DB_POOL_MODE == "pooled" and (SYNC_POOL_SIZE < 1 or DB_ASYNC_POOL_SIZE < 1 or min(SYNC_MAX_OVERFLOW, DB_ASYNC_MAX_OVERFLOW) < 0):
+    raise ValueError(
+        f"FATAL: DB_POOL_SIZE={DB_POOL_SIZE} / DB_MAX_OVERFLOW={DB_MAX_OVERFLOW} can't be split into "
+        f"sync {SYNC_POOL_SIZE}+{SYNC_MAX_OVERFLOW} and async {DB_ASYNC_POOL_SIZE}+{DB_ASYNC_MAX_OVERFLOW}; "
+        "DB_POOL_SIZE must be at least 2 (or set DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW)."
+    )
+
+
+class _PoolMetrics:
+    """Process-wide counters for connection checkouts and the time spent waiting for them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.timeouts = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+
+    def record_wait(self, elapsed_ms: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_total_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.wait_total_ms, 3),
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+            }
+
+
+pool_metrics = _PoolMetrics()
+
+
+class _TimedCheckout:
+    # Times the pool's own "get a connection" step: queue wait in QueuePool,
+    # connect time in NullPool.
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_metrics.record_wait((time.perf_counter() - start) * 1000, timed_out)
+
+
+class MeteredQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class MeteredNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def build_engine(url: str):
+    if DB_POOL_MODE == "serverless":
+        eng = create_engine(url, poolclass=MeteredNullPool, pool_pre_ping=DB_POOL_PRE_PING)
+    else:
+        eng = create_engine(
+            url,
+            poolclass=MeteredQueuePool,
+            pool_size=SYNC_POOL_SIZE,
+            max_overflow=SYNC_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    event.listen(eng, "connect", lambda *args: pool_metrics.incr("connects"))
+    event.listen(eng, "checkout", lambda *args: pool_metrics.incr("checkouts"))
+    event.listen(eng, "checkin", lambda *args: pool_metrics.incr("checkins"))
+    return eng
+
+
+def get_pool_status() -> dict:
+    """Pool configuration, live occupancy and checkout metrics for diagnostics."""
+    # Both engines draw on the same budget, so both pools are reported and counted
+    async_pool = _async_engine.pool if _async_engine is not None else None
+    status = {
+        "mode": DB_POOL_MODE,
+        "pool": engine.pool.status(),
+        "async_pool": async_pool.status() if async_pool is not None else None,
+        **pool_metrics.snapshot(),
+    }
+    if DB_POOL_MODE == "pooled":
+        sync_out = engine.pool.checkedout()
+        async_out = async_pool.checkedout() if async_pool is not None else 0
+        status.update({
+            "size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "sync": {"size": SYNC_POOL_SIZE, "max_overflow": SYNC_MAX_OVERFLOW, "checked_out": sync_out},
+            "async": {"size": DB_ASYNC_POOL_SIZE, "max_overflow": DB_ASYNC_MAX_OVERFLOW, "checked_out": async_out},
+            "checked_out": sync_out + async_out,
+        })
+    return status
+
+
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -42,3 +187,88 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def unit_of_work(db):
+    """One logical write, one transaction.
+
+    Everything done to `db` inside the block is flushed and committed once on
+    exit, or rolled back together if the block raises, so a handler never
+    leaves half of an operation behind. Use `db.flush()` inside the block when
+    a generated id is needed before the commit.
+    """
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+
+
+# ASYNC ENGINE (hot read paths)
+# --------------------------------------------
+# Same database, driven through asyncpg, with its share of the pool budget
+# (DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW). Built lazily on first
+# use so that importing this module never needs the async driver.
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def _async_url(url: str):
+    """Translate the psycopg2 URL for asyncpg; returns (url, connect_args)."""
+    u = urlparse(url)
+    query = parse_qs(u.query)
+    # asyncpg takes TLS settings as a connect argument, not the libpq 'sslmode' parameter
+    sslmode = query.pop("sslmode", [None])[0]
+    u = u._replace(scheme="postgresql+asyncpg", query=urlencode(query, doseq=True))
+    return urlunparse(u), ({"ssl": sslmode} if sslmode else {})
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+        class MeteredAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+            pass
+
+        url, connect_args = _async_url(DATABASE_URL)
+        if DB_POOL_MODE == "serverless":
+            # External poolers (PgBouncer / Neon) hand each transaction to any server
+            # connection, so asyncpg must not cache prepared statements or reuse names
+            connect_args = {
+                **connect_args,
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+            _async_engine = create_async_engine(
+                url, poolclass=MeteredNullPool, pool_pre_ping=DB_POOL_PRE_PING, connect_args=connect_args
+            )
+        else:
+            _async_engine = create_async_engine(
+                url,
+                poolclass=MeteredAsyncQueuePool,
+                pool_size=DB_ASYNC_POOL_SIZE,
+                max_overflow=DB_ASYNC_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING,
+                connect_args=connect_args,
+            )
+        event.listen(_async_engine.sync_engine, "connect", lambda *args: pool_metrics.incr("connects"))
+        event.listen(_async_engine.sync_engine, "checkout", lambda *args: pool_metrics.incr("checkouts"))
+        event.listen(_async_engine.sync_engine, "checkin", lambda *args: pool_metrics.incr("checkins"))
+        _AsyncSessionLocal = sessionmaker(
+            bind=_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db():
+    """Dependency for async DB session management (read endpoints)."""
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,46 @@
+from typing import Optional
+
+# Cities we serve. Addresses are free text, so we look for one of these names
+# inside them to decide which city a provider belongs to.
+KNOWN_CITIES = [
+    "Madurai", "Coimbatore", "Nagapattinam", "Thiruvarur", "Rameshwaram",
+    "Vellore", "Thenkasi", "Salem", "Kanniyakumari", "Trichy", "Tanjore",
+    "Erode", "Tiruppur", "Chennai"
+]
+
+# Placeholder values the registration form has stored in `address` over time
+EMPTY_ADDRESSES = {"", "not provided", "none"}
+
+
+def find_city(text: Optional[str]) -> Optional[str]:
+    """Return the first known city mentioned in `text`, or None."""
+    if not text:
+        return None
+    lowered = text.lower()
+    for city in KNOWN_CITIES:
+        if city.lower() in lowered:
+            return city
+    return None
+
+
+def display_location(location: Optional[str], address: Optional[str]) -> Optional[str]:
+    """The location string the UI shows: the address if it is filled in, else `location`."""
+    if address is None or address.strip().lower() in EMPTY_ADDRESSES:
+        return location
+    return address
+
+
+def normalize_city(location: Optional[str], address: Optional[str] = None) -> Optional[str]:
+    """Derive the indexed `Provider.city` search key from the raw location fields.
+
+    A known city named in the displayed location wins, then one named anywhere in
+    either field, then the trimmed `location` the provider entered as their city.
+    The free-text address is never used as a key. Keys are lower-case so search is
+    a plain equality lookup.
+    """
+    shown = display_location(location, address)
+    city = find_city(shown) or find_city(address) or find_city(location)
+    if city:
+        return city.lower()
+    fallback = (location or "").strip().lower()
+    return fallback or None
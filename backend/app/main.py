@@ -1,7 +1,6 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 import os
 import sys
@@ -14,14 +13,17 @@ if str(current_dir) not in sys.path:
     sys.path.append(str(current_dir))
 
 try:
-    from .database import engine, get_db, Base
-    from .routes import users, services, providers, bookings, admin, complaints, reviews, inquiries
-    from . import models, auth
+    from .database import get_db
+    from . import assets
+    from .compression import CompressionMiddleware
+    from .routes import users, services, providers, bookings, admin, complaints, reviews, inquiries, availability
 
 except (ImportError, ValueError):
     # Fallback for Vercel if relative imports fail
     import database
-    from database import engine, get_db, Base
+    from database import get_db
+    import assets
+    from compression import CompressionMiddleware
     import routes.users as users
     import routes.services as services
     import routes.providers as providers
@@ -30,107 +32,12 @@ except (ImportError, ValueError):
     import routes.complaints as complaints
     import routes.reviews as reviews
     import routes.inquiries as inquiries
-    import models, auth
+    import routes.availability as availability
 
 
-# Create tables and seed admin
-try:
-    Base.metadata.create_all(bind=engine)
-    
-    # Auto-seed admin: Force update password and role for guaranteed access
-    from sqlalchemy.orm import Session
-    db = Session(bind=engine)
-    try:
-        # --- DATA REPAIR: Fix 'Chennai' Location Bug (Enhanced) ---
-        print("DATA REPAIR: Performing deep geographic audit...")
-        # Comprehensive list of cities to scan for in addresses
-        cities = [
-            "Madurai", "Coimbatore", "Nagapattinam", "Thiruvarur", "Rameshwaram", 
-            "Vellore", "Thenkasi", "Salem", "Kanniyakumari", "Trichy", "Tanjore", 
-            "Erode", "Tiruppur", "Chennai"
-        ]
-        
-        # We target anyone whose location is 'Chennai' but address says otherwise
-        mismatched = db.query(models.Provider).filter(models.Provider.location == "Chennai").all()
-        repairs = 0
-        for p in mismatched:
-            addr = p.address.lower() if p.address else ""
-            for city in cities:
-                # If a different city is explicitly mentioned in the address, fix it
-                if city.lower() in addr and city != "Chennai":
-                    print(f"  Repairing ID:{p.id} Name:{p.user.name if p.user else 'N/A'} | '{p.location}' -> '{city}'")
-                    p.location = city
-                    repairs += 1
-                    break
-        if repairs > 0:
-            db.commit()
-            print(f"DATA REPAIR: Fixed {repairs} providers via deep audit.")
-        else:
-            print("DATA REPAIR: Local records are clean.")
-
-        admin_email = "admin@allinone.com"
-        admin_user = db.query(models.User).filter(models.User.email == admin_email).first()
-        
-        if admin_user:
-            print(f"AUTO-SEED: Force updating existing admin {admin_email}")
-            admin_user.password = auth.generate_password_hash("admin123")
-            admin_user.role = "admin"
-        else:
-            print(f"AUTO-SEED: Creating default admin {admin_email}")
-            new_admin = models.User(
-                name="System Admin",
-                email=admin_email,
-                password=auth.generate_password_hash("admin123"),
-                role="admin",
-                phone="0000000000"
-            )
-            db.add(new_admin)
-        
-        db.commit()
-    finally:
-        db.close()
-        
-except Exception as e:
-    print(f"Database sync/seed failed: {e}")
-
-# SCHEMA MIGRATION: Auto-patch missing columns for 'complaints' table
-# This handles the case where the table existed before the new columns were added.
-try:
-    from sqlalchemy import text
-    with engine.connect() as conn:
-        with conn.begin(): # Start transaction
-            # Add 'status' column if missing
-            try:
-                conn.execute(text("ALTER TABLE complaints ADD COLUMN IF NOT EXISTS status VARCHAR DEFAULT 'pending'"))
-            except Exception as e:
-                print(f"Migration warning (status): {e}")
-
-            # Add 'resolution' column if missing
-            try:
-                conn.execute(text("ALTER TABLE complaints ADD COLUMN IF NOT EXISTS resolution TEXT"))
-            except Exception as e:
-                print(f"Migration warning (resolution): {e}")
-
-            # Add 'admin_notes' column if missing
-            try:
-                conn.execute(text("ALTER TABLE complaints ADD COLUMN IF NOT EXISTS admin_notes TEXT"))
-            except Exception as e:
-                print(f"Migration warning (admin_notes): {e}")
-
-            # SCHEMA MIGRATION: Auto-patch missing columns for 'bookings' table
-            try:
-                conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS suggested_date VARCHAR"))
-            except Exception as e:
-                print(f"Migration warning (suggested_date): {e}")
-
-            try:
-                conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS suggested_time VARCHAR"))
-            except Exception as e:
-                print(f"Migration warning (suggested_time): {e}")
-                
-            print("Schema migration for 'complaints' and 'bookings' completed.")
-except Exception as e:
-     print(f"Schema migration failed: {e}")
+# Schema changes, data repair and the admin seed are NOT run on import: a cold
+# start must not touch the database. Apply them at deploy time with
+#   python -m backend.app.migrations all
 
 app = FastAPI(
     title="Urban Company Style API",
@@ -147,6 +54,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated gzip/brotli above a size threshold; settings and metrics in compression.py
+app.add_middleware(CompressionMiddleware)
+
 # Global Exception Handler for better debugging
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -167,44 +77,26 @@ app.include_router(admin.router, prefix="/api", tags=["Admin"])
 app.include_router(complaints.router, prefix="/api", tags=["Complaints"])
 app.include_router(reviews.router, prefix="/api", tags=["Reviews"])
 app.include_router(inquiries.router, prefix="/api", tags=["Inquiries"])
+app.include_router(availability.router, prefix="/api", tags=["Availability"])
 
 # Static Files Hosting (Python-Served Frontend)
 # Files are now bundled INSIDE the package at backend/app/static
 # This guarantees availability in the Vercel Lambda environment.
+# `python -m backend.app.assets build` produces static_dist/ (fingerprinted,
+# precompressed); it is served instead of static/ whenever it exists.
 
-static_path = Path(__file__).parent / "static"
-
-# Mount the static directory to serve js, css, assets directly if requested via /static/
-app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
-
-# Also mount specific folders to matching root paths for compatibility
-for folder in ["js", "css", "assets"]:
-    target = static_path / folder
-    if target.exists():
-        app.mount(f"/{folder}", StaticFiles(directory=str(target)), name=folder)
+# Indexed once: resolving a page is a dict lookup, never a filesystem probe
+static_routes = assets.route_table(*assets.load())
 
 @app.get("/{path_name:path}")
-async def catch_all(path_name: str):
+async def catch_all(path_name: str, request: Request):
     # API routes are already handled above. Everything else is frontend.
-    
-    # default to index.html for root
-    if path_name == "" or path_name == "/":
-        file_path = static_path / "index.html"
-    else:
-        file_path = static_path / path_name
-        
-        # If no extension, try adding .html (clean URLs support)
-        if not file_path.suffix and not file_path.exists():
-             file_path = static_path / f"{path_name}.html"
+    static_file = static_routes.get(path_name.strip("/"))
+    if static_file is not None:
+        return assets.file_response(request, static_file)
 
-    if file_path.exists() and file_path.is_file():
-        return FileResponse(str(file_path))
-    
     # 404 for truly missing files
-    return JSONResponse(
-        {"error": "File not found", "path": path_name, "resolved": str(file_path)}, 
-        status_code=404
-    )
+    return JSONResponse({"error": "File not found", "path": path_name}, status_code=404)
 
 @app.get("/api/health")
 def health_check():
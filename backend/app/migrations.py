@@ -0,0 +1,429 @@
+"""Versioned schema migrations and data-maintenance commands.
+
+Nothing here runs on import. Apply it explicitly at deploy time:
+
+    python -m backend.app.migrations migrate        # bring the schema up to date
+    python -m backend.app.migrations seed-admin     # create the default admin if missing
+    python -m backend.app.migrations recompute-ratings  # rebuild provider ratings from reviews
+    python -m backend.app.migrations reconcile-stats  # recompute dashboard + provider counters
+    python -m backend.app.migrations rebuild-slots  # rebuild the provider_slots availability index
+    python -m backend.app.migrations all            # everything above, in order
+
+The applied version is stored in the single-row `schema_version` table. Every
+migration is written to be idempotent, so a database that predates the marker
+can safely be migrated from version 0.
+"""
+import os
+import sys
+import argparse
+from pathlib import Path
+from sqlalchemy import text, select, func, case, bindparam, inspect, type_coerce, String
+from sqlalchemy.orm import Session
+
+try:
+    from .database import engine, Base
+    from . import models, auth, locations, stats, scheduling, slots
+except (ImportError, ValueError):
+    sys.path.append(str(Path(__file__).parent))
+    from database import engine, Base
+    import models, auth, locations, stats, scheduling, slots
+
+
+# --- Migrations ---
+# Append new steps to MIGRATIONS; never edit or reorder ones that have shipped.
+
+def _create_tables(conn):
+    Base.metadata.create_all(bind=conn)
+
+def _complaint_workflow_columns(conn):
+    conn.execute(text("ALTER TABLE complaints ADD COLUMN IF NOT EXISTS status VARCHAR DEFAULT 'pending'"))
+    conn.execute(text("ALTER TABLE complaints ADD COLUMN IF NOT EXISTS resolution TEXT"))
+    conn.execute(text("ALTER TABLE complaints ADD COLUMN IF NOT EXISTS admin_notes TEXT"))
+
+def _booking_reschedule_columns(conn):
+    conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS suggested_date VARCHAR"))
+    conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS suggested_time VARCHAR"))
+
+def _provider_city_column(conn):
+    conn.execute(text("ALTER TABLE providers ADD COLUMN IF NOT EXISTS city VARCHAR"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_providers_city ON providers (city)"))
+
+def _platform_stats_table(conn):
+    Base.metadata.create_all(bind=conn, tables=[models.PlatformStat.__table__])
+    db = Session(bind=conn)
+    stats.reconcile(db)
+    db.close()
+
+def _provider_rating_aggregates(conn):
+    conn.execute(text("ALTER TABLE providers ADD COLUMN IF NOT EXISTS rating_sum FLOAT DEFAULT 0"))
+    conn.execute(text("ALTER TABLE providers ADD COLUMN IF NOT EXISTS rating_count INTEGER DEFAULT 0"))
+    db = Session(bind=conn)
+    recompute_ratings(db, commit=False)
+    db.close()
+
+def _booking_time_ranges(conn):
+    conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS starts_at TIMESTAMP"))
+    conn.execute(text("ALTER TABLE bookings ADD COLUMN IF NOT EXISTS ends_at TIMESTAMP"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_bookings_provider_slot ON bookings (provider_id, starts_at, ends_at)"))
+    db = Session(bind=conn)
+    backfill_booking_slots(db, commit=False)
+    db.close()
+
+    if conn.dialect.name != "postgresql":
+        return
+    # Refuse to guess which of two overlapping active bookings should win
+    clashes = conn.execute(text("""
+        SELECT a.id, b.id FROM bookings a JOIN bookings b
+          ON a.provider_id = b.provider_id AND a.id < b.id
+         AND a.status IN ('pending', 'confirmed') AND b.status IN ('pending', 'confirmed')
+         AND a.starts_at < b.ends_at AND b.starts_at < a.ends_at
+    """)).fetchall()
+    if clashes:
+        raise RuntimeError(f"Overlapping active bookings must be resolved before migrating: {clashes[:20]}")
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+    conn.execute(text("""
+        ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+        EXCLUDE USING gist (provider_id WITH =, tsrange(starts_at, ends_at) WITH &&)
+        WHERE (status IN ('pending', 'confirmed') AND starts_at IS NOT NULL AND ends_at IS NOT NULL)
+    """))
+
+def _provider_slot_index(conn):
+    Base.metadata.create_all(bind=conn, tables=[models.ProviderSlot.__table__])
+    db = Session(bind=conn)
+    slots.rebuild(db)
+    db.close()
+
+_BOOKING_DATETIME_COLUMNS = (
+    ("booking_date", "DATE", scheduling.parse_date),
+    ("booking_time", "TIME", scheduling.parse_time),
+    ("suggested_date", "DATE", scheduling.parse_date),
+    ("suggested_time", "TIME", scheduling.parse_time),
+)
+
+def _typed_booking_datetimes(conn, batch_size=1000):
+    columns = {c["name"]: c["type"] for c in inspect(conn).get_columns("bookings")}
+    pending = [spec for spec in _BOOKING_DATETIME_COLUMNS if isinstance(columns.get(spec[0]), String)]
+    if pending:
+        # Rewrite every value in canonical form first, so the type change below cannot
+        # trip over formatting. Unparseable booking dates stop the migration; an
+        # unparseable reschedule proposal is dropped (it could never be accepted anyway).
+        table = models.Booking.__table__
+        names = [name for name, _, _ in pending]
+        rewrite = table.update().where(table.c.id == bindparam("b_id")).values(
+            {name: bindparam(name, type_=table.c[name].type) for name in names}
+        )
+        unparseable = []
+        last_id = 0
+        while True:
+            batch = conn.execute(
+                text(f"SELECT id, {', '.join(names)} FROM bookings WHERE id > :last_id ORDER BY id LIMIT :n"),
+                {"last_id": last_id, "n": batch_size},
+            ).fetchall()
+            if not batch:
+                break
+            changes = []
+            for row in batch:
+                change = {"b_id": row[0]}
+                for (name, _, parse), raw in zip(pending, row[1:]):
+                    value = parse(raw) if raw is not None and str(raw).strip() else None
+                    if value is None and raw is not None and name.startswith("booking_"):
+                        unparseable.append((row[0], name, raw))
+                    change[name] = value
+                changes.append(change)
+            conn.execute(rewrite, changes)
+            last_id = batch[-1][0]
+        if unparseable:
+            raise RuntimeError(f"Bookings with unparseable dates/times must be fixed before migrating: {unparseable[:20]}")
+
+        if conn.dialect.name == "postgresql":
+            for name, sql_type, _ in pending:
+                conn.execute(text(f"ALTER TABLE bookings ALTER COLUMN {name} TYPE {sql_type} USING {name}::{sql_type}"))
+    # (provider_id, starts_at) is served by ix_bookings_provider_slot's leading columns
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_bookings_customer_start ON bookings (customer_id, starts_at)"))
+
+_HOT_PATH_INDEXES = (
+    "ix_providers_user_id",
+    "ix_providers_verified_rating",
+    "ix_providers_verified_service",
+    "ix_bookings_status",
+    "ix_bookings_active_provider",
+    "ix_reviews_booking_id",
+    "ix_reviews_provider_id",
+    "ix_reviews_customer_id",
+    "ix_complaints_booking_id",
+    "ix_complaints_customer_id",
+)
+
+def _hot_path_indexes(conn):
+    # Definitions (including partial WHERE clauses) live on the models; create_all only
+    # indexes tables it creates, so add them to existing tables here.
+    indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+    for name in _HOT_PATH_INDEXES:
+        indexes[name].create(bind=conn, checkfirst=True)
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ANALYZE providers, bookings, reviews, complaints"))
+
+# (table, column, referenced table) for every foreign key an account delete cascades through
+_CASCADE_FOREIGN_KEYS = (
+    ("providers", "user_id", "users"),
+    ("bookings", "customer_id", "users"),
+    ("bookings", "provider_id", "providers"),
+    ("reviews", "booking_id", "bookings"),
+    ("reviews", "provider_id", "providers"),
+    ("reviews", "customer_id", "users"),
+    ("complaints", "booking_id", "bookings"),
+    ("complaints", "customer_id", "users"),
+)
+
+def _cascade_foreign_keys(conn):
+    # SQLite can't alter constraints; tables it creates from the models already cascade
+    if conn.dialect.name != "postgresql":
+        return
+    inspector = inspect(conn)
+    for table, column, referred in _CASCADE_FOREIGN_KEYS:
+        for fk in inspector.get_foreign_keys(table):
+            if fk["constrained_columns"] == [column] and fk["name"]:
+                conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{fk["name"]}"'))
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referred} (id) ON DELETE CASCADE"
+        ))
+
+
+MIGRATIONS = [
+    (1, "create base tables", _create_tables),
+    (2, "complaints: status, resolution, admin_notes", _complaint_workflow_columns),
+    (3, "bookings: suggested_date, suggested_time", _booking_reschedule_columns),
+    (4, "providers: normalized city search key", _provider_city_column),
+    (5, "platform_stats: running dashboard counters", _platform_stats_table),
+    (6, "providers: rating_sum, rating_count", _provider_rating_aggregates),
+    (7, "bookings: starts_at/ends_at ranges + no-overlap exclusion constraint", _booking_time_ranges),
+    (8, "provider_slots: hourly availability index", _provider_slot_index),
+    (9, "bookings: DATE/TIME columns + (customer_id, starts_at) index", _typed_booking_datetimes),
+    (10, "foreign-key, status and partial listing indexes", _hot_path_indexes),
+    (11, "ON DELETE CASCADE on user, provider and booking foreign keys", _cascade_foreign_keys),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    version = conn.execute(text("SELECT version FROM schema_version")).scalar()
+    if version is None:
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (0)"))
+        return 0
+    return version
+
+
+def migrate(target: int = LATEST_VERSION) -> int:
+    """Apply every pending migration up to `target`, one transaction per step."""
+    with engine.begin() as conn:
+        current = get_schema_version(conn)
+    print(f"MIGRATE: schema at version {current}, target {target}")
+
+    for version, description, step in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(text("UPDATE schema_version SET version = :v"), {"v": version})
+        print(f"MIGRATE: applied {version} - {description}")
+        current = version
+
+    print(f"MIGRATE: schema is at version {current}")
+    return current
+
+
+# --- Maintenance ---
+
+def repair_provider_locations(db: Session) -> int:
+    """Fix providers stored as 'Chennai' whose address names a different city."""
+    mismatched = db.query(models.Provider).filter(models.Provider.location == "Chennai").all()
+    repairs = 0
+    for p in mismatched:
+        city = locations.find_city(p.address)
+        if city and city != "Chennai":
+            print(f"  Repairing ID:{p.id} | '{p.location}' -> '{city}'")
+            p.location = city
+            repairs += 1
+    db.commit()
+    print(f"DATA REPAIR: Fixed {repairs} providers.")
+    return repairs
+
+
+def backfill_city(db: Session, batch_size: int = 500) -> int:
+    """Recompute Provider.city for existing rows in id-ordered batches."""
+    updated = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(models.Provider.id, models.Provider.location, models.Provider.address, models.Provider.city)
+            .filter(models.Provider.id > last_id)
+            .order_by(models.Provider.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+
+        changes = []
+        for pid, location, address, city in batch:
+            new_city = locations.normalize_city(location, address)
+            if new_city != city:
+                changes.append({"id": pid, "city": new_city})
+        if changes:
+            # Bulk mappings skip mapper events, so city is written exactly as computed here
+            db.bulk_update_mappings(models.Provider, changes)
+            db.commit()
+            updated += len(changes)
+        last_id = batch[-1][0]
+
+    print(f"BACKFILL: Updated city for {updated} providers.")
+    return updated
+
+
+def recompute_ratings(db: Session, commit: bool = True) -> None:
+    """Rebuild every provider's rating_sum / rating_count / rating from reviews in one UPDATE."""
+    Provider, Review = models.Provider, models.Review
+    review_sum = (
+        select(func.coalesce(func.sum(Review.rating), 0))
+        .where(Review.provider_id == Provider.id)
+        .scalar_subquery()
+    )
+    review_count = (
+        select(func.count(Review.id))
+        .where(Review.provider_id == Provider.id)
+        .scalar_subquery()
+    )
+    updated = db.query(Provider).update({
+        Provider.rating_sum: review_sum,
+        Provider.rating_count: review_count,
+        # Providers without reviews keep whatever rating they already display
+        Provider.rating: case((review_count > 0, models.average_rating(review_sum, review_count)), else_=Provider.rating),
+    }, synchronize_session=False)
+    if commit:
+        db.commit()
+    print(f"RATINGS: Recomputed ratings for {updated} providers.")
+
+
+def backfill_booking_slots(db: Session, commit: bool = True, batch_size: int = 1000) -> int:
+    """Fill starts_at/ends_at from booking_date/booking_time where missing."""
+    Booking = models.Booking
+    updated = 0
+    last_id = 0
+    while True:
+        batch = (
+            # Read raw: before migration 9 these columns still hold free-form strings
+            db.query(
+                Booking.id,
+                type_coerce(Booking.booking_date, String),
+                type_coerce(Booking.booking_time, String),
+                Booking.duration_hours,
+            )
+            .filter(Booking.id > last_id, Booking.starts_at.is_(None))
+            .order_by(Booking.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        changes = []
+        for bid, booking_date, booking_time, duration in batch:
+            slot = scheduling.parse_slot(booking_date, booking_time, duration)
+            if slot:
+                changes.append({"id": bid, "starts_at": slot[0], "ends_at": slot[1]})
+            else:
+                print(f"  Booking {bid}: unparseable date/time '{booking_date}' '{booking_time}', left without a slot")
+        if changes:
+            db.bulk_update_mappings(Booking, changes)
+            db.flush()
+            updated += len(changes)
+        last_id = batch[-1][0]
+    if commit:
+        db.commit()
+    print(f"SLOTS: Backfilled time ranges for {updated} bookings.")
+    return updated
+
+
+def reconcile_stats(db: Session) -> None:
+    """Recompute the dashboard counters and per-provider totals from scratch (fixes any drift)."""
+    values = stats.reconcile(db)
+    corrected = stats.reconcile_providers(db)
+    db.commit()
+    print(f"STATS: Reconciled {len(values)} counters: users={values['users']:.0f}, bookings={values['bookings']:.0f}")
+    print(f"STATS: Corrected total_bookings/earnings for {corrected} providers.")
+
+
+def rebuild_slots(db: Session) -> None:
+    """Recreate the availability index from bookings (fixes any drift)."""
+    written = slots.rebuild(db)
+    db.commit()
+    print(f"SLOTS: Rebuilt availability index with {written} hour slots.")
+
+
+def seed_admin(db: Session, reset_password: bool = False) -> None:
+    """Create the default admin account, or restore its role (and optionally password)."""
+    admin_email = os.environ.get("ADMIN_EMAIL", "admin@allinone.com")
+    admin_password = os.environ.get("ADMIN_PASSWORD", "admin123")
+
+    admin_user = db.query(models.User).filter(models.User.email == admin_email).first()
+    if admin_user:
+        print(f"AUTO-SEED: Admin {admin_email} exists")
+        admin_user.role = "admin"
+        if reset_password:
+            print(f"AUTO-SEED: Resetting password for {admin_email}")
+            admin_user.password = auth.generate_password_hash(admin_password)
+    else:
+        print(f"AUTO-SEED: Creating default admin {admin_email}")
+        db.add(models.User(
+            name="System Admin",
+            email=admin_email,
+            password=auth.generate_password_hash(admin_password),
+            role="admin",
+            phone="0000000000"
+        ))
+        stats.user_created(db, "admin")
+    db.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schema migrations and data maintenance")
+    parser.add_argument(
+        "command",
+        choices=["migrate", "version", "repair-locations", "backfill-city", "recompute-ratings", "seed-admin", "reconcile-stats", "rebuild-slots", "all"],
+    )
+    parser.add_argument("--target", type=int, default=LATEST_VERSION, help="migrate: stop at this version")
+    parser.add_argument("--reset-admin-password", action="store_true", help="seed-admin: force the password back to ADMIN_PASSWORD")
+    args = parser.parse_args(argv)
+
+    if args.command == "version":
+        with engine.begin() as conn:
+            print(f"schema version {get_schema_version(conn)} (latest {LATEST_VERSION})")
+        return
+
+    if args.command in ("migrate", "all"):
+        migrate(args.target)
+    if args.command == "migrate":
+        return
+
+    db = Session(bind=engine)
+    try:
+        if args.command in ("repair-locations", "all"):
+            repair_provider_locations(db)
+        if args.command in ("backfill-city", "all"):
+            backfill_city(db)
+        if args.command in ("recompute-ratings", "all"):
+            recompute_ratings(db)
+        if args.command in ("seed-admin", "all"):
+            seed_admin(db, reset_password=args.reset_admin_password)
+        if args.command in ("reconcile-stats", "all"):
+            reconcile_stats(db)
+        if args.command in ("rebuild-slots", "all"):
+            rebuild_slots(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
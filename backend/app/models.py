@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Date, Time, Text, Numeric, Index, cast
+from sqlalchemy import event, text, literal_column
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 try:
     from .database import Base
+    from .locations import normalize_city
 except (ImportError, ValueError):
     from database import Base
+    from locations import normalize_city
 
 class User(Base):
     __tablename__ = "users"
@@ -13,54 +16,81 @@ class User(Base):
     name = Column(String, index=True)
     email = Column(String, unique=True, index=True)
     phone = Column(String)
-    password = Column(String)
+    # Only login reads the hash (undefer(User.password)); any other access raises instead of querying
+    password = deferred(Column(String), raiseload=True)
     role = Column(String) # customer, provider, admin
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    provider_profile = relationship("Provider", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    bookings_as_customer = relationship("Booking", back_populates="customer", cascade="all, delete-orphan")
+    provider_profile = relationship("Provider", back_populates="user", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    bookings_as_customer = relationship("Booking", back_populates="customer", cascade="all, delete-orphan", passive_deletes=True)
 
 class Provider(Base):
     __tablename__ = "providers"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     service_type = Column(String)
     experience_years = Column(Integer)
     hourly_rate = Column(Float)
     location = Column(String)
     address = Column(String, nullable=True) # Address is now linked/required during registration
+    city = Column(String, index=True) # Derived from location/address by locations.normalize_city; search key
     bio = Column(Text)
     background_verified = Column(String, default="pending") # pending, verified, rejected
     availability_status = Column(String, default="available") # available, busy, offline
-    rating = Column(Float, default=0.0)
+    rating = Column(Float, default=0.0) # Displayed average, derived from rating_sum / rating_count
+    rating_sum = Column(Float, default=0.0)
+    rating_count = Column(Integer, default=0)
     total_bookings = Column(Integer, default=0)
     earnings = Column(Float, default=0.0)
 
     # Relationships
     user = relationship("User", back_populates="provider_profile")
-    bookings = relationship("Booking", back_populates="provider", cascade="all, delete-orphan")
-    reviews = relationship("Review", back_populates="provider", cascade="all, delete-orphan")
+    bookings = relationship("Booking", back_populates="provider", cascade="all, delete-orphan", passive_deletes=True)
+    reviews = relationship("Review", back_populates="provider", cascade="all, delete-orphan", passive_deletes=True)
+
+# Public listings only ever show verified providers, so their indexes are partial, and
+# routes/providers.SORT_KEYS sorts by the same rating expression. Listings must filter
+# with PROVIDER_VERIFIED itself. Both constants are inlined rather than bound: asyncpg
+# sends bound parameters, and under a generic plan neither coalesce(rating, $1) nor
+# background_verified = $1 can be matched to these indexes.
+PROVIDER_RATING_SORT = func.coalesce(Provider.rating, literal_column("0.0"))
+PROVIDER_VERIFIED = Provider.background_verified == literal_column("'verified'")
+Index("ix_providers_verified_rating", PROVIDER_RATING_SORT.desc(), Provider.id.desc(), postgresql_where=PROVIDER_VERIFIED)
+Index("ix_providers_verified_service", func.lower(Provider.service_type), postgresql_where=PROVIDER_VERIFIED)
+
+def average_rating(total, count):
+    """SQL expression for the displayed rating: total / count rounded to one decimal."""
+    return func.round(cast(total, Numeric) / count, 1)
+
+@event.listens_for(Provider, "before_insert")
+@event.listens_for(Provider, "before_update")
+def _derive_provider_city(mapper, connection, target):
+    # Keep the indexed search key in step with whatever location/address was written
+    target.city = normalize_city(target.location, target.address)
 
 class Booking(Base):
     __tablename__ = "bookings"
 
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("users.id"))
-    provider_id = Column(Integer, ForeignKey("providers.id"))
+    customer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    provider_id = Column(Integer, ForeignKey("providers.id", ondelete="CASCADE"))
     service_name = Column(String)
-    booking_date = Column(String) 
-    booking_time = Column(String)
+    booking_date = Column(Date)
+    booking_time = Column(Time)
     duration_hours = Column(Integer)
+    # Occupied interval [starts_at, ends_at), derived from booking_date/time + duration (see scheduling.py)
+    starts_at = Column(DateTime, nullable=True)
+    ends_at = Column(DateTime, nullable=True)
     total_amount = Column(Float)
     commission_amount = Column(Float, default=0.0)
     provider_amount = Column(Float, default=0.0)
     address = Column(Text)
     notes = Column(Text)
-    status = Column(String, default="pending") # pending, accepted, completed, cancelled, reschedule_requested
-    suggested_date = Column(String, nullable=True)
-    suggested_time = Column(String, nullable=True)
+    status = Column(String, default="pending", index=True) # pending, accepted, completed, cancelled, reschedule_requested
+    suggested_date = Column(Date, nullable=True)
+    suggested_time = Column(Time, nullable=True)
     refund_status = Column(String, nullable=True) # None, processed, rejected
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -68,16 +98,41 @@ class Booking(Base):
     # Relationships
     customer = relationship("User", back_populates="bookings_as_customer")
     provider = relationship("Provider", back_populates="bookings")
-    complaints = relationship("Complaint", back_populates="booking", cascade="all, delete-orphan")
-    review = relationship("Review", back_populates="booking", uselist=False, cascade="all, delete-orphan")
+    complaints = relationship("Complaint", back_populates="booking", cascade="all, delete-orphan", passive_deletes=True)
+    review = relationship("Review", back_populates="booking", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_bookings_provider_slot", "provider_id", "starts_at", "ends_at"),
+        Index("ix_bookings_customer_start", "customer_id", "starts_at"),
+        # Time-holding bookings only (scheduling.ACTIVE_STATUSES)
+        Index(
+            "ix_bookings_active_provider", "provider_id", "starts_at",
+            postgresql_where=text("status IN ('pending', 'confirmed')"),
+        ),
+    )
+
+class ProviderSlot(Base):
+    __tablename__ = "provider_slots"
+
+    # One row per hour bucket an active booking occupies; maintained by slots.py
+    id = Column(Integer, primary_key=True)
+    provider_id = Column(Integer, ForeignKey("providers.id", ondelete="CASCADE"), nullable=False)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
+    slot_date = Column(Date, nullable=False)
+    slot_start = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_provider_slots_provider_start", "provider_id", "slot_start"),
+        Index("ix_provider_slots_provider_date", "provider_id", "slot_date"),
+    )
 
 class Review(Base):
     __tablename__ = "reviews"
 
     id = Column(Integer, primary_key=True, index=True)
-    booking_id = Column(Integer, ForeignKey("bookings.id"))
-    provider_id = Column(Integer, ForeignKey("providers.id"))
-    customer_id = Column(Integer, ForeignKey("users.id"))
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), index=True)
+    provider_id = Column(Integer, ForeignKey("providers.id", ondelete="CASCADE"), index=True)
+    customer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     rating = Column(Integer)
     comment = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -91,8 +146,8 @@ class Complaint(Base):
     __tablename__ = "complaints"
 
     id = Column(Integer, primary_key=True, index=True)
-    booking_id = Column(Integer, ForeignKey("bookings.id"))
-    customer_id = Column(Integer, ForeignKey("users.id"))
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), index=True)
+    customer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     subject = Column(String)
     description = Column(Text)
     status = Column(String, default="pending") # pending, investigating, resolved, refunded, warned
@@ -129,4 +184,11 @@ class Item(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    description = Column(String)
\ No newline at end of file
+    description = Column(String)
+
+class PlatformStat(Base):
+    __tablename__ = "platform_stats"
+
+    # Running counters maintained by stats.py (users, providers, bookings_<status>, total_sales, ...)
+    key = Column(String, primary_key=True)
+    value = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,154 @@
+import json
+import base64
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, func, text, DateTime
+from sqlalchemy.orm import Query, Session
+
+# Hard cap for any listing endpoint. Clients may ask for less, never more.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Totals are counted exactly up to this many rows; past it they are estimates.
+COUNT_CAP = 10000
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque, URL-safe cursor holding the sort key of the last row on a page."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("utf-8")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        if not isinstance(values, list):
+            raise ValueError("cursor must encode a list")
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(sort_col, id_col, descending: bool, last_value, last_id: int):
+    """Rows strictly after (last_value, last_id) in ORDER BY sort_col, id_col."""
+    if descending:
+        return or_(sort_col < last_value, and_(sort_col == last_value, id_col < last_id))
+    return or_(sort_col > last_value, and_(sort_col == last_value, id_col > last_id))
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def date_range(col, date_from: Optional[date], date_to: Optional[date]) -> List:
+    """Filters for col within [date_from, date_to], both days inclusive; either end may be open."""
+    criteria = []
+    if date_from:
+        criteria.append(col >= datetime.combine(date_from, time.min))
+    if date_to:
+        criteria.append(col < datetime.combine(date_to + timedelta(days=1), time.min))
+    return criteria
+
+
+def approximate_count(db: Session, query: Query, id_col, filtered: bool) -> Tuple[int, bool]:
+    """(total, is_estimate) for a listing, without a full COUNT(*) on big tables.
+
+    Unfiltered listings on Postgres read the planner's row estimate; everything
+    else is counted exactly up to COUNT_CAP rows.
+    """
+    if not filtered and db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": id_col.table.name},
+        ).scalar()
+        if estimate and estimate > COUNT_CAP:
+            return int(estimate), True
+    capped = query.with_entities(id_col).order_by(None).limit(COUNT_CAP + 1).subquery()
+    total = db.query(func.count()).select_from(capped).scalar()
+    return min(total, COUNT_CAP), total > COUNT_CAP
+
+
+def _cursor_value(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def page_query(
+    query: Query,
+    sort_keys: Dict[str, Tuple[Any, bool]],
+    sort_name: Optional[str],
+    id_col,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[Query, str]:
+    """The query for one keyset page (limit + 1 rows, sort key as the last column) and the sort name used.
+
+    `sort_keys` maps a sort name to (expression, descending); unknown names fall
+    back to the first entry.
+    """
+    if sort_name not in sort_keys:
+        sort_name = next(iter(sort_keys))
+    sort_col, descending = sort_keys[sort_name]
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 3 or values[0] != sort_name:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+        last_value = values[1]
+        if last_value is not None and isinstance(sort_col.type, DateTime):
+            last_value = datetime.fromisoformat(last_value)
+        query = query.filter(keyset_filter(sort_col, id_col, descending, last_value, values[2]))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    # Carry the sort key alongside each row so the cursor can be built generically
+    return query.add_columns(sort_col.label("_sort_key")).limit(clamp_page_size(limit) + 1), sort_name
+
+
+def paginate(
+    db: Session,
+    query: Query,
+    filters: List,
+    sort_keys: Dict[str, Tuple[Any, bool]],
+    sort_name: Optional[str],
+    id_col,
+    cursor: Optional[str],
+    limit: int,
+) -> dict:
+    """One keyset page of `query` in the shared listing shape.
+
+    See `page_query` for sorting. The total is only computed for the first page.
+    """
+    limit = clamp_page_size(limit)
+    if filters:
+        query = query.filter(*filters)
+
+    total, is_estimate = (None, False) if cursor else approximate_count(db, query, id_col, bool(filters))
+
+    page, sort_name = page_query(query, sort_keys, sort_name, id_col, cursor, limit)
+    rows = page.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row, last_key = rows[-1][0], rows[-1][-1]
+        next_cursor = encode_cursor(sort_name, _cursor_value(last_key), getattr(last_row, id_col.key))
+
+    return {
+        "items": [row[0] for row in rows],
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_is_estimate": is_estimate,
+    }
+
+
+def in_filter(col, values: Optional[str]) -> List:
+    """Filter for a comma-separated query parameter such as status=pending,confirmed."""
+    wanted = [v.strip() for v in (values or "").split(",") if v.strip()]
+    if not wanted:
+        return []
+    return [col == wanted[0]] if len(wanted) == 1 else [col.in_(wanted)]
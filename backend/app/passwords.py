@@ -0,0 +1,121 @@
+"""Password hashing: configurable cost, run off the request threads.
+
+Hashing is deliberately slow, so a login burst would otherwise pin the API's
+workers. Hash and verify calls are sent to a small bounded process pool
+(PASSWORD_HASH_WORKERS). On platforms without multiprocessing support, such as
+lambdas without /dev/shm, it falls back to a thread pool; hashlib's PBKDF2
+releases the GIL, so threads still help there.
+
+Cost settings come from the environment:
+    PBKDF2_ROUNDS   pbkdf2_sha256 rounds for new hashes (default 29000, passlib's)
+    BCRYPT_ROUNDS   bcrypt cost for legacy hashes (default 12)
+Hashes below the configured cost, or in the deprecated bcrypt scheme, report
+`needs_update`, and login transparently re-hashes them.
+"""
+import os
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+PBKDF2_ROUNDS = int(os.environ.get("PBKDF2_ROUNDS", "29000"))
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+HASH_POOL_MODE = os.environ.get("PASSWORD_HASH_POOL", "process").strip().lower()  # process, thread, inline
+HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", str(HASH_WORKERS * 16)))
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256", "bcrypt"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingBusy(Exception):
+    """Too many hash jobs are already queued; the caller should back off."""
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new_hash). new_hash is set when the stored hash is below current policy."""
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except (ValueError, TypeError):
+        # Unrecognized or empty stored hash
+        return False, None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = 0
+
+
+def _get_pool():
+    global _pool, HASH_POOL_MODE
+    if _pool is None and HASH_POOL_MODE != "inline":
+        with _pool_lock:
+            if _pool is None:
+                if HASH_POOL_MODE == "process":
+                    try:
+                        _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+                    except (OSError, NotImplementedError, ImportError) as e:
+                        print(f"Password hashing: process pool unavailable ({e}); using threads")
+                        HASH_POOL_MODE = "thread"
+                if _pool is None:
+                    _pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwhash")
+    return _pool
+
+
+def _submit(fn, *args):
+    global _pending
+    pool = _get_pool()
+    if pool is None:
+        return None
+    with _pool_lock:
+        if _pending >= HASH_MAX_PENDING:
+            raise HashingBusy("Password hashing queue is full")
+        _pending += 1
+    try:
+        future = pool.submit(fn, *args)
+    except Exception:
+        with _pool_lock:
+            _pending -= 1
+        raise
+    future.add_done_callback(_release)
+    return future
+
+
+def _release(_future):
+    global _pending
+    with _pool_lock:
+        _pending -= 1
+
+
+def run_offloaded(fn, *args):
+    """Run a hashing function in the pool and wait for it (for sync request handlers)."""
+    future = _submit(fn, *args)
+    return fn(*args) if future is None else future.result()
+
+
+async def run_offloaded_async(fn, *args):
+    """Await a hashing function in the pool without blocking the event loop."""
+    future = _submit(fn, *args)
+    return fn(*args) if future is None else await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    return await run_offloaded_async(hash_password, password)
+
+
+async def verify_and_update_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await run_offloaded_async(verify_and_update, password, hashed)
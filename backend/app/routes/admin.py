@@ -1,49 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only, aliased
+from sqlalchemy import func, select
+from typing import Optional
+from datetime import date
 
 try:
-    from ..database import get_db
-    from ..models import User, Provider, Booking, Review, Complaint
+    from ..database import get_db, get_pool_status, unit_of_work
+    from ..models import User, Provider, Booking, Complaint
+    from .. import stats, accounts
+    from ..auth import invalidate_principal, get_current_user, Principal
+    from ..schemas import AdminUserPage, BookingPage, UserOut, ProviderOut, BookingOut
+    from ..serialization import schema_columns
+    from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
+    from ..exports import export_response
+    from ..compression import get_compression_status
 except (ImportError, ValueError):
-    from database import get_db
-    from models import User, Provider, Booking, Review, Complaint
+    from database import get_db, get_pool_status, unit_of_work
+    from models import User, Provider, Booking, Complaint
+    import stats, accounts
+    from auth import invalidate_principal, get_current_user, Principal
+    from schemas import AdminUserPage, BookingPage, UserOut, ProviderOut, BookingOut
+    from serialization import schema_columns
+    from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
+    from exports import export_response
+    from compression import get_compression_status
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 @router.get("/dashboard")
 def admin_stats(db: Session = Depends(get_db)):
     try:
-        # Diagnostic counts
-        users_count = db.query(User).count()
-        providers_count = db.query(Provider).count()
-        bookings_count = db.query(Booking).count()
-        
-        # Log counts for backend visibility
-        print(f"STATS SYNC CHECK: Users={users_count}, Providers={providers_count}, Bookings={bookings_count}")
-        
-        # Revenue calculation
-        total_sales = 0.0
-        platform_revenue = 0.0
-        
-        try:
-            total_sales_raw = db.query(func.sum(Booking.total_amount)).filter(Booking.status == 'completed').scalar()
-            total_sales = float(total_sales_raw) if total_sales_raw else 0.0
-        except Exception as sales_err:
-            print(f"Sales calculation failed: {sales_err}")
-
-        try:
-            platform_revenue_raw = db.query(func.sum(Booking.commission_amount)).filter(Booking.status == 'completed').scalar()
-            platform_revenue = float(platform_revenue_raw) if platform_revenue_raw else 0.0
-        except Exception as rev_err:
-            print(f"Revenue calculation failed: {rev_err}")
+        # Running counters maintained by the write paths; see stats.py
+        counters = stats.get_stats(db)
 
         return {
-            "users": users_count,
-            "providers": providers_count,
-            "bookings": bookings_count,
-            "total_sales": total_sales,
-            "platform_revenue": platform_revenue,
+            "users": int(counters.get("users", 0)),
+            "providers": int(counters.get("providers", 0)),
+            "bookings": int(counters.get("bookings", 0)),
+            "bookings_by_status": {
+                status: int(counters.get(f"bookings_{status}", 0)) for status in stats.BOOKING_STATUSES
+            },
+            "total_sales": float(counters.get("total_sales", 0.0)),
+            "platform_revenue": float(counters.get("platform_revenue", 0.0)),
             "status": "success"
         }
     except Exception as e:
@@ -58,60 +56,183 @@ def admin_stats(db: Session = Depends(get_db)):
             "error": str(e)
         }
 
-from sqlalchemy.orm import joinedload
+@router.get("/db-pool")
+def db_pool_status():
+    # Connection pool occupancy and checkout wait times for this process
+    return get_pool_status()
 
-@router.get("/users")
-def get_all_users(db: Session = Depends(get_db)):
-    try:
-        data = db.query(User).options(joinedload(User.provider_profile)).order_by(User.created_at.desc()).all()
-        print(f"Fetched {len(data)} users for admin list")
-        return data
-    except Exception as e:
-        print(f"Error fetching users: {e}")
-        return []
+@router.get("/compression")
+def compression_status():
+    # Response compression settings and bytes saved by this process
+    return get_compression_status()
+
+USER_SORT_KEYS = {
+    "newest": (User.id, True),
+    "oldest": (User.id, False),
+    "name": (func.coalesce(User.name, ""), False),
+}
+
+def _users_listing(db: Session, role: Optional[str] = None, joined_from: Optional[date] = None,
+                   joined_to: Optional[date] = None):
+    """(query, filters) for the admin user listing, before pagination."""
+    # Provider profiles are fetched by user_id for the current page only; a
+    # join under LIMIT lets a generic plan merge-join the whole providers table
+    query = db.query(User).options(
+        load_only(*schema_columns(UserOut, User)),
+        selectinload(User.provider_profile).load_only(*schema_columns(ProviderOut, Provider))
+    )
+    return query, in_filter(User.role, role) + date_range(User.created_at, joined_from, joined_to)
+
+@router.get("/users", response_model=AdminUserPage)
+def get_all_users(
+    role: Optional[str] = None,
+    joined_from: Optional[date] = None,
+    joined_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    query, filters = _users_listing(db, role, joined_from, joined_to)
+    return paginate(db, query, filters, USER_SORT_KEYS, sort, User.id, cursor, limit)
 
 @router.delete("/users/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        print(f"ADM ALERT: Manually deleting user {user_id} and all related data to bypass DB constraints")
-
-        # 1. Handle Provider Profile and dependency chain
-        provider = db.query(Provider).filter(Provider.user_id == user_id).first()
-        if provider:
-            # Delete everything linked to provider's bookings
-            p_booking_ids = [b.id for b in db.query(Booking.id).filter(Booking.provider_id == provider.id).all()]
-            if p_booking_ids:
-                db.query(Review).filter(Review.booking_id.in_(p_booking_ids)).delete(synchronize_session=False)
-                db.query(Complaint).filter(Complaint.booking_id.in_(p_booking_ids)).delete(synchronize_session=False)
-                db.query(Booking).filter(Booking.id.in_(p_booking_ids)).delete(synchronize_session=False)
-            
-            # Delete provider reviews directly
-            db.query(Review).filter(Review.provider_id == provider.id).delete(synchronize_session=False)
-            db.delete(provider)
-        
-        # 2. Handle Customer activity
-        db.query(Review).filter(Review.customer_id == user_id).delete(synchronize_session=False)
-        db.query(Complaint).filter(Complaint.customer_id == user_id).delete(synchronize_session=False)
-        db.query(Booking).filter(Booking.customer_id == user_id).delete(synchronize_session=False)
-        
-        # 3. Final User Deletion
-        db.delete(user)
-        db.commit()
+        with unit_of_work(db):
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+
+            accounts.delete_user(db, user)
+        invalidate_principal(user_id)
         print(f"ADM SUCCESS: User {user_id} completely removed")
         return {"message": "User and all related data deleted successfully"}
     except Exception as e:
-        db.rollback()
         print(f"CRITICAL DELETE ERROR: {e}")
         raise HTTPException(status_code=500, detail=f"Database deletion failed: {str(e)}")
 
-@router.get("/bookings")
-def get_all_bookings(db: Session = Depends(get_db)):
-    try:
-        return db.query(Booking).all()
-    except Exception as e:
-        print(f"Error fetching bookings: {e}")
-        return []
+BOOKING_SORT_KEYS = {
+    "newest": (Booking.id, True),
+    "oldest": (Booking.id, False),
+    "upcoming": (Booking.starts_at, False),
+    "amount": (func.coalesce(Booking.total_amount, 0.0), True),
+}
+
+def _bookings_listing(db: Session, status: Optional[str] = None, date_from: Optional[date] = None,
+                      date_to: Optional[date] = None, provider_id: Optional[int] = None,
+                      customer_id: Optional[int] = None, sort: Optional[str] = None):
+    """(query, filters) for the admin booking listing, before pagination."""
+    query = db.query(Booking).options(
+        load_only(*schema_columns(BookingOut, Booking)),
+        joinedload(Booking.customer).load_only(*schema_columns(UserOut, User)),
+        joinedload(Booking.provider).load_only(*schema_columns(ProviderOut, Provider))
+        .joinedload(Provider.user).load_only(*schema_columns(UserOut, User))
+    )
+    # Date range is on the booked time, not on when the booking was made
+    filters = in_filter(Booking.status, status) + date_range(Booking.starts_at, date_from, date_to)
+    if provider_id is not None:
+        filters.append(Booking.provider_id == provider_id)
+    if customer_id is not None:
+        filters.append(Booking.customer_id == customer_id)
+    if sort == "upcoming":
+        # Keyset pages can't step over NULL sort keys; legacy rows without a slot are left out
+        filters.append(Booking.starts_at.isnot(None))
+    return query, filters
+
+@router.get("/bookings", response_model=BookingPage)
+def get_all_bookings(
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    provider_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    query, filters = _bookings_listing(db, status, date_from, date_to, provider_id, customer_id, sort)
+    return paginate(db, query, filters, BOOKING_SORT_KEYS, sort, Booking.id, cursor, limit)
+
+
+# --- Exports (streamed; see exports.py) ---
+# Date ranges are on the booked time (starts_at), like the bookings listing.
+# Exports carry every customer's and provider's contact and payout data: admins only.
+
+def _require_admin(current_user: Principal):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to export data")
+
+@router.get("/exports/bookings")
+def export_bookings(
+    format: str = "csv",
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    _require_admin(current_user)
+    customer = aliased(User)
+    provider_user = aliased(User)
+    statement = (
+        select(
+            Booking.id, Booking.status, Booking.service_name,
+            Booking.booking_date, Booking.booking_time, Booking.duration_hours,
+            Booking.customer_id, customer.name.label("customer_name"), customer.email.label("customer_email"),
+            Booking.provider_id, provider_user.name.label("provider_name"),
+            Booking.total_amount, Booking.commission_amount, Booking.provider_amount,
+            Booking.refund_status, Booking.created_at,
+        )
+        .outerjoin(customer, customer.id == Booking.customer_id)
+        .outerjoin(Provider, Provider.id == Booking.provider_id)
+        .outerjoin(provider_user, provider_user.id == Provider.user_id)
+        .where(*in_filter(Booking.status, status), *date_range(Booking.starts_at, date_from, date_to))
+        .order_by(Booking.id)
+    )
+    return export_response(statement, format, "bookings")
+
+
+@router.get("/exports/complaints")
+def export_complaints(
+    format: str = "csv",
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    _require_admin(current_user)
+    statement = (
+        select(
+            Complaint.id, Complaint.status, Complaint.booking_id, Complaint.customer_id,
+            User.email.label("customer_email"), Complaint.subject, Complaint.description,
+            Complaint.resolution, Complaint.admin_notes, Complaint.created_at,
+        )
+        .outerjoin(User, User.id == Complaint.customer_id)
+        .where(*in_filter(Complaint.status, status), *date_range(Complaint.created_at, date_from, date_to))
+        .order_by(Complaint.id)
+    )
+    return export_response(statement, format, "complaints")
+
+
+@router.get("/exports/earnings")
+def export_earnings(
+    format: str = "csv",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    """Completed-booking ledger: what each booking paid out and what the platform kept."""
+    _require_admin(current_user)
+    statement = (
+        select(
+            Booking.id.label("booking_id"), Booking.booking_date,
+            Booking.provider_id, User.name.label("provider_name"), User.email.label("provider_email"),
+            Booking.total_amount, Booking.commission_amount, Booking.provider_amount, Booking.refund_status,
+        )
+        .outerjoin(Provider, Provider.id == Booking.provider_id)
+        .outerjoin(User, User.id == Provider.user_id)
+        .where(Booking.status == "completed", *date_range(Booking.starts_at, date_from, date_to))
+        .order_by(Booking.id)
+    )
+    return export_response(statement, format, "earnings")
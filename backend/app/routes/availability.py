@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import func
+from typing import List, Optional
+from datetime import date, time
+
+try:
+    from ..database import get_db
+    from ..models import Provider, User, PROVIDER_VERIFIED
+    from ..schemas import ProviderOut, UserOut
+    from ..serialization import schema_columns
+    from ..locations import normalize_city
+    from ..scheduling import slot_bounds
+    from ..slots import free_slots, busy_at, MAX_CALENDAR_DAYS, WORKDAY_START_HOUR, WORKDAY_END_HOUR
+    from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+except (ImportError, ValueError):
+    from database import get_db
+    from models import Provider, User, PROVIDER_VERIFIED
+    from schemas import ProviderOut, UserOut
+    from serialization import schema_columns
+    from locations import normalize_city
+    from scheduling import slot_bounds
+    from slots import free_slots, busy_at, MAX_CALENDAR_DAYS, WORKDAY_START_HOUR, WORKDAY_END_HOUR
+    from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/availability", tags=["Availability"])
+
+
+@router.get("/providers/{provider_id}")
+def get_provider_calendar(provider_id: int, start_date: date, end_date: Optional[date] = None, db: Session = Depends(get_db)):
+    """Free one-hour slots per day for a provider, within working hours."""
+    start, end = start_date, end_date or start_date
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_CALENDAR_DAYS} days")
+
+    if not db.query(Provider.id).filter(Provider.id == provider_id).first():
+        raise HTTPException(status_code=404, detail="Provider not found")
+
+    calendar = free_slots(db, provider_id, start, end)
+    return {
+        "provider_id": provider_id,
+        "workday": {"start": f"{WORKDAY_START_HOUR:02d}:00", "end": f"{WORKDAY_END_HOUR:02d}:00"},
+        "days": [
+            {"date": day.isoformat(), "free": [slot.strftime("%H:%M") for slot in slots]}
+            for day, slots in calendar.items()
+        ],
+    }
+
+
+@router.get("/search", response_model=List[ProviderOut])
+def search_available_providers(
+    date: date,
+    time: time,
+    duration_hours: int = Query(1, ge=1, le=24),
+    service_type: Optional[str] = None,
+    city: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """Verified providers with no active booking overlapping the requested time."""
+    starts_at, ends_at = slot_bounds(date, time, duration_hours)
+
+    query = db.query(Provider).options(
+        load_only(*schema_columns(ProviderOut, Provider)),
+        joinedload(Provider.user).load_only(*schema_columns(UserOut, User))
+    ).filter(
+        PROVIDER_VERIFIED,
+        ~busy_at(Provider.id, starts_at, ends_at),
+    )
+    if service_type:
+        query = query.filter(func.lower(Provider.service_type) == service_type.strip().lower())
+    if city:
+        key = normalize_city(city)
+        if key:
+            query = query.filter(Provider.city == key)
+
+    return query.order_by(Provider.rating.desc(), Provider.id).limit(limit).all()
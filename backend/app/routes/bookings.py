@@ -1,149 +1,263 @@
 # app/routes/bookings.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
 from typing import List
-from datetime import datetime
+from datetime import datetime, date, time
 
 try:
-    from ..database import get_db
-    from ..models import Booking, Provider
-    from ..schemas import BookingCreate, BookingOut, BookingUpdate
+    from ..database import get_db, get_async_db, unit_of_work
+    from ..auth import get_current_user, Principal
+    from ..models import Booking, Provider, User
+    from ..schemas import BookingCreate, BookingOut, BookingUpdate, BulkStatusUpdate, BulkResult, ProviderOut, UserOut
+    from .. import stats
+    from ..scheduling import slot_bounds, check_slot_free, is_slot_conflict, slots_taken, ACTIVE_STATUSES
+    from ..slots import sync_booking_slots, resync_bookings
+    from ..serialization import Projection, FastJSONResponse
 except (ImportError, ValueError):
-    from database import get_db
-    from models import Booking, Provider
-    from schemas import BookingCreate, BookingOut, BookingUpdate
+    from database import get_db, get_async_db, unit_of_work
+    from auth import get_current_user, Principal
+    from models import Booking, Provider, User
+    from schemas import BookingCreate, BookingOut, BookingUpdate, BulkStatusUpdate, BulkResult, ProviderOut, UserOut
+    import stats
+    from scheduling import slot_bounds, check_slot_free, is_slot_conflict, slots_taken, ACTIVE_STATUSES
+    from slots import sync_booking_slots, resync_bookings
+    from serialization import Projection, FastJSONResponse
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+SLOT_TAKEN_DETAIL = "Professional is already booked at this time. Please choose another time or professional."
+
+# Platform's share of a completed booking; the provider receives the rest
+COMMISSION_RATE = 0.15
+
+# Optional in BookingUpdate (omit to keep), but a booking can't have them cleared
+NON_NULLABLE_UPDATES = ("service_name", "booking_date", "booking_time", "duration_hours", "address")
+
+# Booking lists are read as column tuples shaped like BookingOut (see serialization.py)
+_customer = aliased(User)
+_provider_user = aliased(User)
+BOOKING_LIST = Projection(BookingOut, Booking, {
+    "customer": Projection(UserOut, _customer),
+    "provider": Projection(ProviderOut, Provider, {"user": Projection(UserOut, _provider_user)}),
+})
+
+
+def _booking_list(*where):
+    return (
+        select(*BOOKING_LIST.columns())
+        .outerjoin(_customer, _customer.id == Booking.customer_id)
+        .outerjoin(Provider, Provider.id == Booking.provider_id)
+        .outerjoin(_provider_user, _provider_user.id == Provider.user_id)
+        .where(*where)
+    )
+
 
 @router.post("/", response_model=BookingOut, status_code=status.HTTP_201_CREATED)
 def create_booking(booking: BookingCreate, customer_id: int, db: Session = Depends(get_db)):
     try:
-        # Get provider to calculate total amount
-        provider = db.query(Provider).filter(Provider.id == booking.provider_id).first()
-        if not provider:
-            raise HTTPException(status_code=404, detail="Provider not found")
+        with unit_of_work(db):
+            # Only the rate is needed to calculate the total amount
+            provider = db.query(Provider.hourly_rate).filter(Provider.id == booking.provider_id).first()
+            if not provider:
+                raise HTTPException(status_code=404, detail="Provider not found")
         
-        # Check for overlaps
-        existing_booking = db.query(Booking).filter(
-            Booking.provider_id == booking.provider_id,
-            Booking.booking_date == booking.booking_date,
-            Booking.status.in_(["pending", "confirmed"])
-        ).first()
-        
-        if existing_booking:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Professional is already booked on this date. Please choose another date or professional."
-            )
+            # Check for overlaps. On Postgres the bookings_no_overlap exclusion constraint
+            # decides atomically during the INSERT; elsewhere we query first.
+            starts_at, ends_at = slot_bounds(booking.booking_date, booking.booking_time, booking.duration_hours)
+            if not check_slot_free(db, booking.provider_id, starts_at, ends_at):
+                raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
 
-        # Ensure hourly_rate is not None
-        hourly_rate = provider.hourly_rate if provider.hourly_rate is not None else 0.0
-        total_amount = hourly_rate * booking.duration_hours
+            # Ensure hourly_rate is not None
+            hourly_rate = provider.hourly_rate if provider.hourly_rate is not None else 0.0
+            total_amount = hourly_rate * booking.duration_hours
         
-        new_booking = Booking(
-            customer_id=customer_id,
-            provider_id=booking.provider_id,
-            service_name=booking.service_name,
-            booking_date=booking.booking_date,
-            booking_time=booking.booking_time,
-            duration_hours=booking.duration_hours,
-            total_amount=total_amount,
-            address=booking.address,
-            notes=booking.notes,
-            status="pending"
-        )
+            new_booking = Booking(
+                customer_id=customer_id,
+                provider_id=booking.provider_id,
+                service_name=booking.service_name,
+                booking_date=booking.booking_date,
+                booking_time=booking.booking_time,
+                duration_hours=booking.duration_hours,
+                starts_at=starts_at,
+                ends_at=ends_at,
+                total_amount=total_amount,
+                address=booking.address,
+                notes=booking.notes,
+                status="pending"
+            )
         
-        db.add(new_booking)
-        db.commit()
+            db.add(new_booking)
+            db.flush()
+            sync_booking_slots(db, new_booking)
+            stats.booking_created(db, new_booking)
+            # Atomic SQL increment in the same transaction (no lost updates under concurrency)
+            stats.provider_counters(db, booking.provider_id, bookings=1)
         db.refresh(new_booking)
         
-        # Update provider stats
-        provider.total_bookings += 1
-        db.commit()
-        
         return new_booking
     except HTTPException:
         raise
+    except IntegrityError as e:
+        if is_slot_conflict(e):
+            raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
+        print(f"CRITICAL BOOKING ERROR: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to create booking: {str(e)}")
     except Exception as e:
-        db.rollback()
         print(f"CRITICAL BOOKING ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create booking: {str(e)}")
 
 
 @router.get("/customer/{customer_id}", response_model=List[BookingOut])
-def get_customer_bookings(customer_id: int, db: Session = Depends(get_db)):
+async def get_customer_bookings(customer_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        from sqlalchemy.orm import joinedload
-        bookings = db.query(Booking).options(
-            joinedload(Booking.customer),
-            joinedload(Booking.provider).joinedload(Provider.user)
-        ).filter(Booking.customer_id == customer_id).all()
-        return bookings
+        rows = (await db.execute(_booking_list(Booking.customer_id == customer_id))).all()
+        return FastJSONResponse(BOOKING_LIST.build_all(rows))
     except Exception as e:
         print(f"Error fetching customer bookings: {e}")
         return []
 
 
 @router.get("/provider/{provider_id}", response_model=List[BookingOut])
-def get_provider_bookings(provider_id: int, db: Session = Depends(get_db)):
-    from sqlalchemy.orm import joinedload
-    bookings = db.query(Booking).options(
-        joinedload(Booking.customer),
-        joinedload(Booking.provider).joinedload(Provider.user)
-    ).filter(Booking.provider_id == provider_id).all()
-    return bookings
+async def get_provider_bookings(provider_id: int, db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(_booking_list(Booking.provider_id == provider_id))).all()
+    return FastJSONResponse(BOOKING_LIST.build_all(rows))
 
 
 @router.get("/{booking_id}", response_model=BookingOut)
 def get_booking(booking_id: int, db: Session = Depends(get_db)):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
-    if not booking:
+    row = db.execute(_booking_list(Booking.id == booking_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Booking not found")
-    return booking
+    return FastJSONResponse(BOOKING_LIST.build(row))
 
 
 @router.patch("/{booking_id}/status")
 def update_booking_status(booking_id: int, new_status: str, db: Session = Depends(get_db)):
     try:
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
+        with unit_of_work(db):
+            # Row lock: two concurrent "complete" calls must not both pay out
+            booking = db.query(Booking).filter(Booking.id == booking_id).with_for_update().first()
+            if not booking:
+                raise HTTPException(status_code=404, detail="Booking not found")
         
-        # If moving to completed, calculate split
-        if new_status == "completed" and booking.status != "completed":
-            commission_rate = 0.15
-            total_amount = booking.total_amount if booking.total_amount is not None else 0.0
-            booking.commission_amount = total_amount * commission_rate
-            booking.provider_amount = total_amount - booking.commission_amount
-            
-            # Update provider's total earnings
-            provider = db.query(Provider).filter(Provider.id == booking.provider_id).first()
-            if provider:
-                provider.earnings += booking.provider_amount
+            # If moving to completed, calculate split
+            if new_status == "completed" and booking.status != "completed":
+                total_amount = booking.total_amount if booking.total_amount is not None else 0.0
+                booking.commission_amount = total_amount * COMMISSION_RATE
+                booking.provider_amount = total_amount - booking.commission_amount
                 
-        booking.status = new_status
-        booking.updated_at = datetime.utcnow()
-        db.commit()
+            stats.booking_status_changed(db, booking, booking.status, new_status)
+            booking.status = new_status
+            booking.updated_at = datetime.utcnow()
+            sync_booking_slots(db, booking)
         
         return {"message": f"Booking status updated to {new_status}"}
     except HTTPException:
         raise
+    except IntegrityError as e:
+        # e.g. re-activating a cancelled booking whose slot has since been taken
+        if is_slot_conflict(e):
+            raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
+        print(f"CRITICAL STATUS UPDATE ERROR: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update booking status: {str(e)}")
     except Exception as e:
-        db.rollback()
         print(f"CRITICAL STATUS UPDATE ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update booking status: {str(e)}")
 
 
+@router.post("/bulk/status", response_model=BulkResult)
+def bulk_update_booking_status(
+    payload: BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Move many bookings to one status in a single transaction using set-based UPDATEs.
+
+    Same rules as update_booking_status: entering "completed" splits the amount
+    and adds the provider's share to their earnings (leaving it takes it back),
+    here in SQL for the whole set. Admins only.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to update bookings in bulk")
+    ids = list(dict.fromkeys(payload.ids))
+    new_status = payload.status
+    try:
+        with unit_of_work(db):
+            # Lock the rows so a concurrent request can't complete (and pay out) them twice
+            rows = {
+                row.id: row for row in db.query(
+                    Booking.id, Booking.status, Booking.total_amount, Booking.commission_amount,
+                ).filter(Booking.id.in_(ids)).with_for_update()
+            }
+
+            blocked = set()
+            if new_status in ACTIVE_STATUSES:
+                # Re-activating bookings whose time has since been given to someone else
+                blocked = slots_taken(db, [row.id for row in rows.values() if row.status not in ACTIVE_STATUSES])
+
+            changing = [bid for bid in ids if bid in rows and rows[bid].status != new_status and bid not in blocked]
+            if changing:
+                values = {"status": new_status, "updated_at": datetime.utcnow()}
+                if new_status == "completed":
+                    total = func.coalesce(Booking.total_amount, 0.0)
+                    values["commission_amount"] = total * COMMISSION_RATE
+                    values["provider_amount"] = total - total * COMMISSION_RATE
+                if new_status != "completed":
+                    # Leaving completed takes the payout back out of the running total
+                    stats.provider_earnings_for_bookings(
+                        db, [bid for bid in changing if rows[bid].status == "completed"], sign=-1
+                    )
+                db.execute(
+                    update(Booking).where(Booking.id.in_(changing)).values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if new_status == "completed":
+                    stats.provider_earnings_for_bookings(db, changing)
+
+                resync_bookings(db, changing)
+                deltas = {}
+                for bid in changing:
+                    row = rows[bid]
+                    total_amount = row.total_amount or 0.0
+                    commission = total_amount * COMMISSION_RATE if new_status == "completed" else row.commission_amount
+                    stats.status_change_deltas(row.status, new_status, total_amount, commission, deltas)
+                stats.bump(db, **deltas)
+    except IntegrityError as e:
+        if is_slot_conflict(e):
+            raise HTTPException(status_code=400, detail="Some of these bookings overlap each other or another booking; nothing was changed.")
+        print(f"CRITICAL BULK STATUS ERROR: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update bookings: {str(e)}")
+    except Exception as e:
+        print(f"CRITICAL BULK STATUS ERROR: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update bookings: {str(e)}")
+
+    results = []
+    for bid in ids:
+        if bid not in rows:
+            results.append({"id": bid, "result": "not_found"})
+        elif bid in blocked:
+            results.append({"id": bid, "result": "slot_taken", "detail": SLOT_TAKEN_DETAIL})
+        elif rows[bid].status == new_status:
+            results.append({"id": bid, "result": "unchanged", "detail": f"already {new_status}"})
+        else:
+            results.append({"id": bid, "result": "updated"})
+    return {"requested": len(ids), "updated": len(changing), "results": results}
+
+
 @router.delete("/{booking_id}")
 def cancel_booking(booking_id: int, db: Session = Depends(get_db)):
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    booking.status = "cancelled"
-    booking.updated_at = datetime.utcnow()
-    db.commit()
+    with unit_of_work(db):
+        stats.booking_status_changed(db, booking, booking.status, "cancelled")
+        booking.status = "cancelled"
+        booking.updated_at = datetime.utcnow()
+        sync_booking_slots(db, booking)
     
     return {"message": "Booking cancelled successfully"}
 
@@ -151,67 +265,74 @@ def cancel_booking(booking_id: int, db: Session = Depends(get_db)):
 @router.patch("/{booking_id}", response_model=BookingOut)
 def update_booking(booking_id: int, booking_update: BookingUpdate, db: Session = Depends(get_db)):
     try:
-        booking = db.query(Booking).filter(Booking.id == booking_id).first()
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-
-        if booking.status not in ["pending", "confirmed"]:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Cannot edit booking in '{booking.status}' status."
-            )
+        with unit_of_work(db):
+            booking = db.query(Booking).filter(Booking.id == booking_id).first()
+            if not booking:
+                raise HTTPException(status_code=404, detail="Booking not found")
 
-        update_data = booking_update.dict(exclude_unset=True)
-        
-        # Check for overlaps if date is changed
-        if "booking_date" in update_data and update_data["booking_date"] != booking.booking_date:
-            existing_booking = db.query(Booking).filter(
-                Booking.provider_id == booking.provider_id,
-                Booking.booking_date == update_data["booking_date"],
-                Booking.status.in_(["pending", "confirmed"]),
-                Booking.id != booking_id
-            ).first()
-            
-            if existing_booking:
+            if booking.status not in ["pending", "confirmed"]:
                 raise HTTPException(
                     status_code=400, 
-                    detail=f"Professional is already booked on this date. Please choose another date."
+                    detail=f"Cannot edit booking in '{booking.status}' status."
                 )
 
-        # Recalculate total amount if duration is changed
-        if "duration_hours" in update_data:
-            provider = db.query(Provider).filter(Provider.id == booking.provider_id).first()
-            if provider:
-                hourly_rate = provider.hourly_rate if provider.hourly_rate is not None else 0.0
-                booking.total_amount = hourly_rate * update_data["duration_hours"]
+            update_data = booking_update.dict(exclude_unset=True)
+            cleared = [key for key in NON_NULLABLE_UPDATES if key in update_data and update_data[key] is None]
+            if cleared:
+                raise HTTPException(status_code=422, detail=f"{', '.join(cleared)} cannot be null")
+        
+            # Recompute the occupied interval if date, time or duration changed
+            if {"booking_date", "booking_time", "duration_hours"} & update_data.keys():
+                starts_at, ends_at = slot_bounds(
+                    update_data.get("booking_date", booking.booking_date),
+                    update_data.get("booking_time", booking.booking_time),
+                    update_data.get("duration_hours", booking.duration_hours),
+                )
+                if not check_slot_free(db, booking.provider_id, starts_at, ends_at, exclude_id=booking_id):
+                    raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
+                booking.starts_at = starts_at
+                booking.ends_at = ends_at
+
+            # Recalculate total amount if duration is changed
+            if "duration_hours" in update_data:
+                provider = db.query(Provider.hourly_rate).filter(Provider.id == booking.provider_id).first()
+                if provider:
+                    hourly_rate = provider.hourly_rate if provider.hourly_rate is not None else 0.0
+                    booking.total_amount = hourly_rate * update_data["duration_hours"]
 
-        for key, value in update_data.items():
-            setattr(booking, key, value)
+            for key, value in update_data.items():
+                setattr(booking, key, value)
             
-        booking.updated_at = datetime.utcnow()
-        db.commit()
+            booking.updated_at = datetime.utcnow()
+            sync_booking_slots(db, booking)
         db.refresh(booking)
         
         return booking
     except HTTPException:
         raise
+    except IntegrityError as e:
+        if is_slot_conflict(e):
+            raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
+        print(f"CRITICAL BOOKING UPDATE ERROR: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update booking: {str(e)}")
     except Exception as e:
-        db.rollback()
         print(f"CRITICAL BOOKING UPDATE ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update booking: {str(e)}")
 
 
 @router.patch("/{booking_id}/reschedule")
-def request_reschedule(booking_id: int, suggested_date: str, suggested_time: str, db: Session = Depends(get_db)):
+def request_reschedule(booking_id: int, suggested_date: date, suggested_time: time, db: Session = Depends(get_db)):
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    booking.suggested_date = suggested_date
-    booking.suggested_time = suggested_time
-    booking.status = "reschedule_requested"
-    booking.updated_at = datetime.utcnow()
-    db.commit()
+    with unit_of_work(db):
+        booking.suggested_date = suggested_date
+        booking.suggested_time = suggested_time
+        stats.booking_status_changed(db, booking, booking.status, "reschedule_requested")
+        booking.status = "reschedule_requested"
+        booking.updated_at = datetime.utcnow()
+        sync_booking_slots(db, booking)
 
     return {"message": "Reschedule request sent to customer"}
 
@@ -222,16 +343,31 @@ def handle_reschedule_response(booking_id: int, accept: bool, db: Session = Depe
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
+    new_status = "confirmed" if accept else "pending"
     if accept:
+        if booking.suggested_date is None or booking.suggested_time is None:
+            raise HTTPException(status_code=400, detail="No reschedule has been proposed for this booking")
+        starts_at, ends_at = slot_bounds(booking.suggested_date, booking.suggested_time, booking.duration_hours)
+        if not check_slot_free(db, booking.provider_id, starts_at, ends_at, exclude_id=booking_id):
+            raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
         booking.booking_date = booking.suggested_date
         booking.booking_time = booking.suggested_time
-        booking.status = "confirmed"
-    else:
-        booking.status = "pending"
-
-    booking.suggested_date = None
-    booking.suggested_time = None
-    booking.updated_at = datetime.utcnow()
-    db.commit()
+        booking.starts_at = starts_at
+        booking.ends_at = ends_at
+    elif not check_slot_free(db, booking.provider_id, booking.starts_at, booking.ends_at, exclude_id=booking_id):
+        raise HTTPException(status_code=400, detail="The original time has since been booked. Please pick a new time.")
+    try:
+        with unit_of_work(db):
+            stats.booking_status_changed(db, booking, booking.status, new_status)
+            booking.status = new_status
+
+            booking.suggested_date = None
+            booking.suggested_time = None
+            booking.updated_at = datetime.utcnow()
+            sync_booking_slots(db, booking)
+    except IntegrityError as e:
+        if is_slot_conflict(e):
+            raise HTTPException(status_code=400, detail=SLOT_TAKEN_DETAIL)
+        raise
 
     return {"message": "Reschedule response processed"}
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 try:
-    from ..database import get_db
+    from ..database import get_db, unit_of_work
     from ..models import Complaint, Booking, User
-    from ..schemas import ComplaintCreate, ComplaintOut
+    from ..schemas import ComplaintCreate, ComplaintOut, ComplaintPage
+    from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
+    from .. import stats
+    from ..slots import sync_booking_slots
 except (ImportError, ValueError):
-    from database import get_db
+    from database import get_db, unit_of_work
     from models import Complaint, Booking, User
-    from schemas import ComplaintCreate, ComplaintOut
+    from schemas import ComplaintCreate, ComplaintOut, ComplaintPage
+    from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
+    import stats
+    from slots import sync_booking_slots
 
 router = APIRouter(prefix="/complaints", tags=["Complaints"])
 
@@ -24,19 +31,18 @@ def create_complaint(complaint: ComplaintCreate, customer_id: int, db: Session =
         )
     
     try:
-        new_complaint = Complaint(
-            booking_id=complaint.booking_id,
-            customer_id=customer_id,
-            subject=complaint.subject,
-            description=complaint.description,
-            status="pending" # Explicitly set status to prevent null serialization issues
-        )
-        db.add(new_complaint)
-        db.commit()
+        with unit_of_work(db):
+            new_complaint = Complaint(
+                booking_id=complaint.booking_id,
+                customer_id=customer_id,
+                subject=complaint.subject,
+                description=complaint.description,
+                status="pending" # Explicitly set status to prevent null serialization issues
+            )
+            db.add(new_complaint)
         db.refresh(new_complaint)
         return new_complaint
     except Exception as e:
-        db.rollback()
         # Extract the original database error if available
         error_msg = str(e)
         if hasattr(e, 'orig') and e.orig:
@@ -48,15 +54,25 @@ def create_complaint(complaint: ComplaintCreate, customer_id: int, db: Session =
             detail=f"Database Error: {error_msg}"
         )
 
-@router.get("/", response_model=List[ComplaintOut])
-@router.get("", response_model=List[ComplaintOut], include_in_schema=False)
-def get_all_complaints(db: Session = Depends(get_db)):
-    try:
-        # Simple list for admin. In real app, check admin role.
-        return db.query(Complaint).all()
-    except Exception as e:
-        print(f"Error fetching complaints: {e}")
-        return []
+COMPLAINT_SORT_KEYS = {
+    "newest": (Complaint.id, True),
+    "oldest": (Complaint.id, False),
+}
+
+@router.get("/", response_model=ComplaintPage)
+@router.get("", response_model=ComplaintPage, include_in_schema=False)
+def get_all_complaints(
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    # Admin list. In real app, check admin role.
+    filters = in_filter(Complaint.status, status) + date_range(Complaint.created_at, date_from, date_to)
+    return paginate(db, db.query(Complaint), filters, COMPLAINT_SORT_KEYS, sort, Complaint.id, cursor, limit)
 
 @router.get("/customer/{customer_id}", response_model=List[ComplaintOut])
 def get_customer_complaints(customer_id: int, db: Session = Depends(get_db)):
@@ -71,9 +87,9 @@ def resolve_complaint(complaint_id: int, resolve_data: ComplaintResolve, db: Ses
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    complaint.status = "resolved"
-    complaint.resolution = resolve_data.resolution
-    db.commit()
+    with unit_of_work(db):
+        complaint.status = "resolved"
+        complaint.resolution = resolve_data.resolution
     return {"message": "Complaint marked as resolved"}
 
 @router.patch("/{complaint_id}/investigate")
@@ -82,8 +98,8 @@ def investigate_complaint(complaint_id: int, db: Session = Depends(get_db)):
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    complaint.status = "investigating"
-    db.commit()
+    with unit_of_work(db):
+        complaint.status = "investigating"
     return {"message": "Complaint status changed to investigating"}
 
 @router.patch("/{complaint_id}/refund")
@@ -92,17 +108,19 @@ def refund_complaint(complaint_id: int, db: Session = Depends(get_db)):
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    # Update complaint status
-    complaint.status = "refunded"
-    complaint.resolution = "System-initiated refund processed for the customer."
-    
-    # Update booking status
-    booking = complaint.booking
-    if booking:
-        booking.refund_status = "processed"
-        booking.status = "cancelled" 
+    with unit_of_work(db):
+        # Update complaint status
+        complaint.status = "refunded"
+        complaint.resolution = "System-initiated refund processed for the customer."
+        
+        # Update booking status
+        booking = complaint.booking
+        if booking:
+            booking.refund_status = "processed"
+            stats.booking_status_changed(db, booking, booking.status, "cancelled")
+            booking.status = "cancelled" 
+            sync_booking_slots(db, booking)
         
-    db.commit()
     return {"message": "Refund processed and complaint updated"}
 
 @router.patch("/{complaint_id}/warn")
@@ -111,8 +129,8 @@ def warn_provider(complaint_id: int, db: Session = Depends(get_db)):
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    complaint.status = "warned"
-    complaint.admin_notes = "Official warning issued to provider based on this complaint."
+    with unit_of_work(db):
+        complaint.status = "warned"
+        complaint.admin_notes = "Official warning issued to provider based on this complaint."
     
-    db.commit()
     return {"message": "Provider warned and complaint updated"}
@@ -1,33 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 try:
-    from ..database import get_db
+    from ..database import get_db, unit_of_work
     from ..models import Inquiry
-    from ..schemas import InquiryCreate, InquiryOut
+    from ..schemas import InquiryCreate, InquiryOut, InquiryPage
+    from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
 except (ImportError, ValueError):
-    from database import get_db
+    from database import get_db, unit_of_work
     from models import Inquiry
-    from schemas import InquiryCreate, InquiryOut
+    from schemas import InquiryCreate, InquiryOut, InquiryPage
+    from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
 
 router = APIRouter(prefix="/inquiries", tags=["Inquiries"])
 
 @router.post("/", response_model=InquiryOut, status_code=status.HTTP_201_CREATED)
 def create_inquiry(inquiry: InquiryCreate, db: Session = Depends(get_db)):
     new_inquiry = Inquiry(**inquiry.dict())
-    db.add(new_inquiry)
-    db.commit()
+    with unit_of_work(db):
+        db.add(new_inquiry)
     db.refresh(new_inquiry)
     return new_inquiry
 
-@router.get("/", response_model=List[InquiryOut])
-def get_all_inquiries(db: Session = Depends(get_db)):
-    try:
-        # In real app, check admin role
-        return db.query(Inquiry).all()
-    except Exception as e:
-        print(f"Error fetching inquiries: {e}")
-        return []
+INQUIRY_SORT_KEYS = {
+    "newest": (Inquiry.id, True),
+    "oldest": (Inquiry.id, False),
+}
+
+@router.get("/", response_model=InquiryPage)
+def get_all_inquiries(
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    # In real app, check admin role
+    filters = in_filter(Inquiry.status, status) + date_range(Inquiry.created_at, date_from, date_to)
+    return paginate(db, db.query(Inquiry), filters, INQUIRY_SORT_KEYS, sort, Inquiry.id, cursor, limit)
 
 @router.patch("/{inquiry_id}/status")
 def update_inquiry_status(inquiry_id: int, status: str, db: Session = Depends(get_db)):
@@ -35,6 +48,6 @@ def update_inquiry_status(inquiry_id: int, status: str, db: Session = Depends(ge
     if not inquiry:
         raise HTTPException(status_code=404, detail="Inquiry not found")
     
-    inquiry.status = status
-    db.commit()
+    with unit_of_work(db):
+        inquiry.status = status
     return {"message": "Inquiry status updated"}
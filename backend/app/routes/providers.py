@@ -1,27 +1,52 @@
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update, literal_column
 from typing import List, Optional
+from datetime import date
 
 try:
-    from ..database import get_db
-    from ..auth import get_current_user, get_current_user_optional
-    from ..schemas import ProviderOut, UserOut, ProviderStatusUpdate
-    from ..models import Provider, Review, User
+    from ..database import get_db, get_async_db, unit_of_work
+    from ..auth import get_current_user, get_current_user_optional, Principal
+    from ..schemas import ProviderOut, ProviderPage, UserOut, ProviderStatusUpdate, BulkIds, BulkResult
+    from ..models import Provider, Review, User, PROVIDER_RATING_SORT, PROVIDER_VERIFIED
+    from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, keyset_filter
+    from ..locations import normalize_city
+    from ..slots import busy_on
+    from ..serialization import Projection, FastJSONResponse, schema_columns
 except (ImportError, ValueError):
-    from database import get_db
-    from auth import get_current_user, get_current_user_optional
-    from schemas import ProviderOut, UserOut
-    from models import Provider, Review, User
+    from database import get_db, get_async_db, unit_of_work
+    from auth import get_current_user, get_current_user_optional, Principal
+    from schemas import ProviderOut, ProviderPage, UserOut, ProviderStatusUpdate, BulkIds, BulkResult
+    from models import Provider, Review, User, PROVIDER_RATING_SORT, PROVIDER_VERIFIED
+    from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, keyset_filter
+    from locations import normalize_city
+    from slots import busy_on
+    from serialization import Projection, FastJSONResponse, schema_columns
 
 router = APIRouter(prefix="/providers", tags=["Providers"])
 
 
-from sqlalchemy.orm import joinedload
+# Listing rows are plain columns shaped like ProviderOut (see serialization.py)
+PROVIDER_LIST = Projection(ProviderOut, Provider, {"user": Projection(UserOut, User)})
+# Entity reads load the same columns, with the user joined instead of lazy-loaded
+PROVIDER_OUT = (
+    load_only(*schema_columns(ProviderOut, Provider)),
+    joinedload(Provider.user).load_only(*schema_columns(UserOut, User)),
+)
+
+# sort_by -> (sort key, descending). Provider.id breaks ties in the same direction
+# so that (sort key, id) is a total order and keyset pages never skip or repeat rows.
+# Constants are inlined (see models.PROVIDER_RATING_SORT).
+SORT_KEYS = {
+    "rating": (PROVIDER_RATING_SORT, True),
+    "price_low": (func.coalesce(Provider.hourly_rate, literal_column("0.0")), False),
+    "price_high": (func.coalesce(Provider.hourly_rate, literal_column("0.0")), True),
+    "experience": (func.coalesce(Provider.experience_years, literal_column("0")), True),
+}
 
-@router.get("/", response_model=List[ProviderOut])
-def get_providers(
+
+def _provider_listing(
     service_type: Optional[str] = None,
     location: Optional[str] = None,
     min_rating: Optional[float] = None,
@@ -29,44 +54,31 @@ def get_providers(
     max_price: Optional[float] = None,
     min_experience: Optional[int] = None,
     availability_status: Optional[str] = None,
-    booking_date: Optional[str] = None, 
+    booking_date: Optional[date] = None,
     sort_by: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
-    print(f"\n>>> [API] get_providers GET received")
-    print(f">>> Params: service='{service_type}', location='{location}', avail='{availability_status}', date='{booking_date}'")
-    
-    query = db.query(Provider).options(joinedload(Provider.user)).filter(Provider.background_verified == "verified")
+    """The listing statement (one extra row past `limit`) and the sort name it resolved to."""
+    query = (
+        select(*PROVIDER_LIST.columns())
+        .outerjoin(User, User.id == Provider.user_id)
+        .filter(PROVIDER_VERIFIED)
+    )
 
     if booking_date:
-        try:
-            from ..models import Booking
-        except (ImportError, ValueError):
-            from models import Booking
-        booked_ids = db.query(Booking.provider_id).filter(
-            Booking.booking_date == booking_date,
-            Booking.status.in_(["pending", "confirmed"])
-        ).all()
-        ids = [i[0] for i in booked_ids]
-        query = query.filter(~Provider.id.in_(ids))
-        print(f">>> Filtered by date: {booking_date} (Excl IDs: {ids})")
+        # Anti-join against the slot index: drop providers with any active booking that day
+        query = query.filter(~busy_on(Provider.id, booking_date))
 
     if service_type:
-        st = service_type.strip().lower()
-        query = query.filter(Provider.service_type.ilike(f"{st}"))
-        print(f">>> Filtered by service: '{st}'")
+        # Case-insensitive equality on lower(service_type), served by ix_providers_verified_service
+        query = query.filter(func.lower(Provider.service_type) == service_type.strip().lower())
 
     if location:
-        loc = location.strip().lower()
-        # Match against the same field that is displayed in the UI
-        # Logic: if address is not null and not empty, match against address. Else match against location.
-        from sqlalchemy import func, case
-        display_location = case(
-            (or_(Provider.address == None, Provider.address == "", Provider.address == "Not Provided", Provider.address == "None"), Provider.location),
-            else_=Provider.address
-        )
-        query = query.filter(display_location.ilike(f"%{loc}%"))
-        print(f">>> Filtered by dynamic display_location: '{loc}'")
+        # Provider.city is a normalized, indexed key; normalize the query the same way
+        city = normalize_city(location)
+        if city:
+            query = query.filter(Provider.city == city)
 
     if min_rating:
         query = query.filter(Provider.rating >= min_rating)
@@ -83,29 +95,64 @@ def get_providers(
     if availability_status:
         query = query.filter(Provider.availability_status == availability_status.lower())
 
-    # Sorting
-    if sort_by == "rating":
-        query = query.order_by(Provider.rating.desc())
-    elif sort_by == "price_low":
-        query = query.order_by(Provider.hourly_rate.asc())
-    elif sort_by == "price_high":
-        query = query.order_by(Provider.hourly_rate.desc())
-    elif sort_by == "experience":
-        query = query.order_by(Provider.experience_years.desc())
+    # Sorting (unknown values fall back to rating, as before)
+    sort_name = sort_by if sort_by in SORT_KEYS else "rating"
+    sort_col, descending = SORT_KEYS[sort_name]
+
+    # Keyset pagination: resume strictly after the last row of the previous page
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 3 or values[0] != sort_name:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+        query = query.filter(keyset_filter(sort_col, Provider.id, descending, values[1], values[2]))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), Provider.id.desc())
     else:
-        query = query.order_by(Provider.rating.desc())
+        query = query.order_by(sort_col.asc(), Provider.id.asc())
 
-    results = query.all()
-    print(f">>> RETURNED {len(results)} PROVIDERS")
-    for p in results:
-        print(f"    [MATCH] ID:{p.id} | Name:{p.user.name if p.user else 'N/A'} | Loc:'{p.location}' | Addr:'{p.address}'")
+    # Fetch one extra row to learn whether another page exists
+    return query.limit(limit + 1), sort_name
 
-    return results
+
+@router.get("/", response_model=ProviderPage)
+async def get_providers(
+    service_type: Optional[str] = None,
+    location: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_experience: Optional[int] = None,
+    availability_status: Optional[str] = None,
+    booking_date: Optional[date] = None,
+    sort_by: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    query, sort_name = _provider_listing(
+        service_type, location, min_rating, min_price, max_price, min_experience,
+        availability_status, booking_date, sort_by, cursor, limit,
+    )
+    results = PROVIDER_LIST.build_all((await db.execute(query)).all())
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        last_value = {
+            "rating": last["rating"],
+            "price_low": last["hourly_rate"],
+            "price_high": last["hourly_rate"],
+            "experience": last["experience_years"],
+        }[sort_name]
+        next_cursor = encode_cursor(sort_name, last_value or 0, last["id"])
+
+    return FastJSONResponse({"items": results, "next_cursor": next_cursor})
 
 
 @router.get("/profile/{user_id}", response_model=ProviderOut)
 def get_provider_by_user_id(user_id: int, db: Session = Depends(get_db)):
-    provider = db.query(Provider).filter(Provider.user_id == user_id).first()
+    provider = db.query(Provider).options(*PROVIDER_OUT).filter(Provider.user_id == user_id).first()
     if not provider:
         raise HTTPException(status_code=404, detail="Provider profile not found for this user")
     return provider
@@ -116,9 +163,9 @@ def get_provider_details(
     provider_id: int, 
     admin_review: Optional[bool] = False, 
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional)
+    current_user: Optional[Principal] = Depends(get_current_user_optional)
 ):
-    provider = db.query(Provider).filter(Provider.id == provider_id).first()
+    provider = db.query(Provider).options(*PROVIDER_OUT).filter(Provider.id == provider_id).first()
     
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
@@ -136,34 +183,69 @@ def get_provider_details(
 
 @router.get("/service/{service_type}", response_model=List[ProviderOut])
 def get_providers_by_service(service_type: str, db: Session = Depends(get_db)):
-    return db.query(Provider).filter(
-        Provider.service_type == service_type,
-        Provider.background_verified == "verified"
+    return db.query(Provider).options(*PROVIDER_OUT).filter(
+        func.lower(Provider.service_type) == service_type.strip().lower(),
+        PROVIDER_VERIFIED
     ).all()
 
 
 @router.patch("/{provider_id}/verify")
 def verify_provider(provider_id: int, db: Session = Depends(get_db)):
     try:
-        provider = db.query(Provider).filter(Provider.id == provider_id).first()
-        if not provider:
-            raise HTTPException(status_code=404, detail="Provider not found")
+        with unit_of_work(db):
+            provider = db.query(Provider).filter(Provider.id == provider_id).first()
+            if not provider:
+                raise HTTPException(status_code=404, detail="Provider not found")
         
-        provider.background_verified = "verified"
-        db.commit()
+            provider.background_verified = "verified"
         return {"message": "Provider verified successfully"}
     except Exception as e:
-        db.rollback()
         print(f"CRITICAL PROVIDER VERIFY ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to verify provider: {str(e)}")
 
 
+@router.post("/bulk/verify", response_model=BulkResult)
+def bulk_verify_providers(
+    payload: BulkIds,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Verify many providers in one transaction with a single UPDATE. Admins only."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized to verify providers")
+    ids = list(dict.fromkeys(payload.ids))
+    try:
+        with unit_of_work(db):
+            existing = dict(db.query(Provider.id, Provider.background_verified).filter(Provider.id.in_(ids)).all())
+            to_verify = [pid for pid in ids if pid in existing and existing[pid] != "verified"]
+            if to_verify:
+                db.execute(
+                    update(Provider)
+                    .where(Provider.id.in_(to_verify))
+                    .values(background_verified="verified")
+                    .execution_options(synchronize_session=False)
+                )
+    except Exception as e:
+        print(f"CRITICAL BULK VERIFY ERROR: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to verify providers: {str(e)}")
+
+    results = []
+    for pid in ids:
+        if pid not in existing:
+            results.append({"id": pid, "result": "not_found"})
+        elif existing[pid] == "verified":
+            results.append({"id": pid, "result": "unchanged", "detail": "already verified"})
+        else:
+            results.append({"id": pid, "result": "updated"})
+    return {"requested": len(ids), "updated": len(to_verify), "results": results}
+
+
 @router.patch("/{provider_id}/status")
 def update_provider_status(
     provider_id: int, 
     status_update: ProviderStatusUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     provider = db.query(Provider).filter(Provider.id == provider_id).first()
     if not provider:
@@ -178,10 +260,9 @@ def update_provider_status(
         raise HTTPException(status_code=400, detail="Invalid status. Must be 'available' or 'busy'")
         
     try:
-        provider.availability_status = status
-        db.commit()
+        with unit_of_work(db):
+            provider.availability_status = status
         return {"message": "Status updated successfully", "status": provider.availability_status}
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update status: {str(e)}")
 
@@ -1,80 +1,102 @@
 # app/routes/reviews.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import List
 
 try:
-    from ..database import get_db
-    from ..models import Review, Booking, Provider, User
-    from ..schemas import ReviewCreate, ReviewOut
+    from ..database import get_db, get_async_db, unit_of_work
+    from ..models import Review, Booking, Provider, User, average_rating
+    from ..schemas import ReviewCreate, ReviewOut, ProviderOut, UserOut
+    from ..serialization import Projection, FastJSONResponse
 except (ImportError, ValueError):
-    from database import get_db
-    from models import Review, Booking, Provider, User
-    from schemas import ReviewCreate, ReviewOut
+    from database import get_db, get_async_db, unit_of_work
+    from models import Review, Booking, Provider, User, average_rating
+    from schemas import ReviewCreate, ReviewOut, ProviderOut, UserOut
+    from serialization import Projection, FastJSONResponse
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
+_customer = aliased(User)
+_provider_user = aliased(User)
+REVIEW_LIST = Projection(ReviewOut, Review, {
+    "customer": Projection(UserOut, _customer),
+    "provider": Projection(ProviderOut, Provider, {"user": Projection(UserOut, _provider_user)}),
+})
+
+
+def _review_list(*where):
+    return (
+        select(*REVIEW_LIST.columns())
+        .outerjoin(_customer, _customer.id == Review.customer_id)
+        .outerjoin(Provider, Provider.id == Review.provider_id)
+        .outerjoin(_provider_user, _provider_user.id == Provider.user_id)
+        .where(*where)
+    )
+
 
 @router.post("/", response_model=ReviewOut, status_code=status.HTTP_201_CREATED)
 def create_review(review: ReviewCreate, customer_id: int, db: Session = Depends(get_db)):
     try:
-        # Check if booking exists
-        booking = db.query(Booking).filter(Booking.id == review.booking_id).first()
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
+        with unit_of_work(db):
+            # Check if booking exists
+            booking = db.query(Booking).filter(Booking.id == review.booking_id).first()
+            if not booking:
+                raise HTTPException(status_code=404, detail="Booking not found")
         
-        # Check if booking belongs to customer
-        if booking.customer_id != customer_id:
-            raise HTTPException(status_code=403, detail="Not authorized")
+            # Check if booking belongs to customer
+            if booking.customer_id != customer_id:
+                raise HTTPException(status_code=403, detail="Not authorized")
         
-        # Only completed services can be reviewed
-        if booking.status != "completed":
-            raise HTTPException(status_code=400, detail="Only completed bookings can be reviewed")
+            # Only completed services can be reviewed
+            if booking.status != "completed":
+                raise HTTPException(status_code=400, detail="Only completed bookings can be reviewed")
         
-        # Check if review already exists
-        existing_review = db.query(Review).filter(Review.booking_id == review.booking_id).first()
-        if existing_review:
-            raise HTTPException(status_code=400, detail="Review already exists for this booking")
+            # Check if review already exists
+            existing_review = db.query(Review).filter(Review.booking_id == review.booking_id).first()
+            if existing_review:
+                raise HTTPException(status_code=400, detail="Review already exists for this booking")
         
-        # Create review
-        new_review = Review(
-            booking_id=review.booking_id,
-            provider_id=booking.provider_id,
-            customer_id=customer_id,
-            rating=review.rating,
-            comment=review.comment
-        )
+            # Create review
+            new_review = Review(
+                booking_id=review.booking_id,
+                provider_id=booking.provider_id,
+                customer_id=customer_id,
+                rating=review.rating,
+                comment=review.comment
+            )
         
-        db.add(new_review)
-        db.commit()
+            db.add(new_review)
+
+            # Update provider rating incrementally in the same transaction. SET expressions
+            # see the pre-update row, so the average uses the old sum/count plus this review.
+            new_sum = func.coalesce(Provider.rating_sum, 0) + review.rating
+            new_count = func.coalesce(Provider.rating_count, 0) + 1
+            db.query(Provider).filter(Provider.id == booking.provider_id).update({
+                Provider.rating_sum: new_sum,
+                Provider.rating_count: new_count,
+                Provider.rating: average_rating(new_sum, new_count),
+            }, synchronize_session=False)
+
         db.refresh(new_review)
         
-        # Update provider rating
-        provider = db.query(Provider).filter(Provider.id == booking.provider_id).first()
-        if provider:
-            reviews = db.query(Review).filter(Review.provider_id == provider.id).all()
-            if reviews:
-                avg_rating = sum(r.rating for r in reviews) / len(reviews)
-                provider.rating = round(float(avg_rating), 1)
-                db.commit()
-        
         return new_review
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         print(f"CRITICAL REVIEW ERROR: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create review: {str(e)}")
 
 
 @router.get("/provider/{provider_id}", response_model=List[ReviewOut])
-def get_provider_reviews(provider_id: int, db: Session = Depends(get_db)):
-    reviews = db.query(Review).filter(Review.provider_id == provider_id).all()
-    return reviews
+async def get_provider_reviews(provider_id: int, db: AsyncSession = Depends(get_async_db)):
+    # One joined query of plain columns shaped like ReviewOut (async sessions can't lazy-load)
+    rows = (await db.execute(_review_list(Review.provider_id == provider_id))).all()
+    return FastJSONResponse(REVIEW_LIST.build_all(rows))
 
 @router.get("/customer/{customer_id}", response_model=List[ReviewOut])
 def get_customer_reviews(customer_id: int, db: Session = Depends(get_db)):
-    reviews = db.query(Review).filter(Review.customer_id == customer_id).all()
-    # Ideally we'd join with Provider/User to get names, but schema ReviewOut uses IDs.
-    # Frontend can fetch names or we update schema. For simple mode, IDs might suffice or we enrich return.
-    return reviews
\ No newline at end of file
+    # Same joined columns as the provider listing, instead of lazy-loading customer/provider per review
+    rows = db.execute(_review_list(Review.customer_id == customer_id)).all()
+    return FastJSONResponse(REVIEW_LIST.build_all(rows))
\ No newline at end of file
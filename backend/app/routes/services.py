@@ -3,10 +3,12 @@ from sqlalchemy.orm import Session
 
 try:
     from ..database import get_db
-    from ..models import Service, User, Booking
+    from ..models import Service
+    from .. import stats
 except (ImportError, ValueError):
     from database import get_db
-    from models import Service, User, Booking
+    from models import Service
+    import stats
 
 router = APIRouter(prefix="/services", tags=["Services"])
 
@@ -15,18 +17,18 @@ router = APIRouter(prefix="/services", tags=["Services"])
 def get_services(db: Session = Depends(get_db)):
     return db.query(Service).all()
 
-from ..models import Provider, Booking, User
-
 @router.get("/stats")
 def get_public_stats(db: Session = Depends(get_db)):
     """Returns basic counts for the landing page."""
     try:
-        providers_count = db.query(Provider).count()
-        # For 'Happy Customers', let's count actual bookings or active users
-        customers_count = db.query(User).filter(User.role == 'customer').count()
-        completed_services = db.query(Booking).filter(Booking.status == 'completed').count()
+        # Cached running counters (see stats.py) instead of counting tables per visit
+        counters = stats.get_stats(db)
+        providers_count = int(counters.get("providers", 0))
+        customers_count = int(counters.get("customers", 0))
+        completed_services = int(counters.get("bookings_completed", 0))
         
         return {
+            "active_providers": providers_count, # Unpadded, for the customer dashboard
             "providers": max(providers_count, 12), # Minimum 12 for UI aesthetics if empty
             "customers": max(customers_count, 250), # Minimum 250 for UI aesthetics if empty
             "completed": max(completed_services, 500), # Minimum 500 for UI aesthetics if empty
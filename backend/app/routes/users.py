@@ -1,20 +1,32 @@
 # app/routes/users.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 from typing import List, Optional
+from datetime import date
 from pydantic import BaseModel, EmailStr
 
 try:
-    from ..database import get_db
-    from ..schemas import UserCreate, UserOut, UserLogin, ProviderCreate, ProviderOut
-    from ..models import User, Provider, Booking, Review, Complaint
-    from ..auth import generate_password_hash, verify_password, create_access_token, get_current_user
+    from ..database import get_db, get_async_db, unit_of_work
+    from ..schemas import UserCreate, UserOut, UserLogin, ProviderCreate, ProviderOut, UserPage
+    from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
+    from ..models import User, Provider
+    # Aliased: this module defines its own /me route function called get_current_user
+    from ..auth import create_user_token, invalidate_principal, Principal
+    from ..passwords import hash_password, run_offloaded, verify_and_update_async, HashingBusy
+    from ..auth import get_current_user as require_current_user
+    from .. import stats, accounts
 except (ImportError, ValueError):
-    from database import get_db
-    from schemas import UserCreate, UserOut, UserLogin, ProviderCreate, ProviderOut
-    from models import User, Provider, Booking, Review, Complaint
-    from auth import generate_password_hash, verify_password, create_access_token, get_current_user
+    from database import get_db, get_async_db, unit_of_work
+    from schemas import UserCreate, UserOut, UserLogin, ProviderCreate, ProviderOut, UserPage
+    from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, date_range, in_filter
+    from models import User, Provider
+    from auth import create_user_token, invalidate_principal, Principal
+    from passwords import hash_password, run_offloaded, verify_and_update_async, HashingBusy
+    from auth import get_current_user as require_current_user
+    import stats, accounts
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -23,6 +35,35 @@ class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     phone: Optional[str] = None
 
+
+def _hash_new_password(password: str) -> str:
+    # Runs in the hashing pool; this request's worker thread only waits
+    try:
+        return run_offloaded(hash_password, password)
+    except HashingBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly")
+
+
+async def _authenticate(db: AsyncSession, email: str, password: str) -> User:
+    result = await db.execute(select(User).options(undefer(User.password)).where(User.email == email))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    try:
+        valid, new_hash = await verify_and_update_async(password, user.password)
+    except HashingBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly")
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Transparent upgrade: the stored hash used an outdated scheme or cost
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+    return user
+
+
 @router.post("/register/customer", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 def register_customer(user: UserCreate, db: Session = Depends(get_db)):
     # Check if email exists
@@ -31,7 +72,7 @@ def register_customer(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_password = generate_password_hash(user.password)
+    hashed_password = _hash_new_password(user.password)
     new_user = User(
         name=user.name,
         email=user.email,
@@ -39,8 +80,9 @@ def register_customer(user: UserCreate, db: Session = Depends(get_db)):
         password=hashed_password,
         role="customer"
     )
-    db.add(new_user)
-    db.commit()
+    with unit_of_work(db):
+        db.add(new_user)
+        stats.user_created(db, "customer")
     db.refresh(new_user)
     return new_user
 
@@ -53,7 +95,7 @@ def register_provider(provider_data: ProviderCreate, db: Session = Depends(get_d
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create user account
-    hashed_password = generate_password_hash(provider_data.password)
+    hashed_password = _hash_new_password(provider_data.password)
     new_user = User(
         name=provider_data.name,
         email=provider_data.email,
@@ -61,13 +103,11 @@ def register_provider(provider_data: ProviderCreate, db: Session = Depends(get_d
         password=hashed_password,
         role="provider"
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
     
-    # Create provider profile
+    # Create provider profile; the relationship lets one flush insert the user
+    # first and fill in user_id, so both rows commit (or fail) together
     new_provider = Provider(
-        user_id=new_user.id,
+        user=new_user,
         service_type=provider_data.service_type,
         experience_years=provider_data.experience_years,
         hourly_rate=provider_data.hourly_rate,
@@ -75,24 +115,20 @@ def register_provider(provider_data: ProviderCreate, db: Session = Depends(get_d
         address=provider_data.address,
         bio=provider_data.bio
     )
-    db.add(new_provider)
-    db.commit()
+    with unit_of_work(db):
+        db.add(new_provider)
+        stats.user_created(db, "provider")
     db.refresh(new_provider)
     
     return new_provider
 
 
 @router.post("/login")
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == credentials.email).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    if not verify_password(credentials.password, user.password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await _authenticate(db, credentials.email, credentials.password)
     
     # Generate token
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_user_token(user)
 
     return {
         "message": "Login successful",
@@ -108,17 +144,12 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     # OAuth2PasswordRequestForm uses 'username', not 'email'
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    if not verify_password(form_data.password, user.password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    user = await _authenticate(db, form_data.username, form_data.password)
     
     # Generate token
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_user_token(user)
 
     # OAuth2 spec requires exactly this JSON structure
     return {"access_token": access_token, "token_type": "bearer"}
@@ -132,9 +163,24 @@ def get_current_user(user_id: int, db: Session = Depends(get_db)):
     return user
 
 
-@router.get("/", response_model=List[UserOut])
-def get_all_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+USER_SORT_KEYS = {
+    "newest": (User.id, True),
+    "oldest": (User.id, False),
+    "name": (func.coalesce(User.name, ""), False),
+}
+
+@router.get("/", response_model=UserPage)
+def get_all_users(
+    role: Optional[str] = None,
+    joined_from: Optional[date] = None,
+    joined_to: Optional[date] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    filters = in_filter(User.role, role) + date_range(User.created_at, joined_from, joined_to)
+    return paginate(db, db.query(User), filters, USER_SORT_KEYS, sort, User.id, cursor, limit)
 
 @router.put("/{user_id}", response_model=UserOut)
 def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
@@ -142,24 +188,25 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if user_update.name:
-        user.name = user_update.name
-    if user_update.email:
-        # Check if email is taken by another user
-        existing = db.query(User).filter(User.email == user_update.email).first()
-        if existing and existing.id != user_id:
-             raise HTTPException(status_code=400, detail="Email already in use")
-        user.email = user_update.email
-    if user_update.phone:
-        user.phone = user_update.phone
+    with unit_of_work(db):
+        if user_update.name:
+            user.name = user_update.name
+        if user_update.email:
+            # Check if email is taken by another user
+            existing = db.query(User).filter(User.email == user_update.email).first()
+            if existing and existing.id != user_id:
+                 raise HTTPException(status_code=400, detail="Email already in use")
+            user.email = user_update.email
+        if user_update.phone:
+            user.phone = user_update.phone
         
-    db.commit()
+    invalidate_principal(user_id)
     db.refresh(user)
     return user
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_200_OK)
-def delete_user_account(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_user_account(user_id: int, current_user: Principal = Depends(require_current_user), db: Session = Depends(get_db)):
     if current_user.id != user_id and current_user.role != 'admin':
         raise HTTPException(status_code=403, detail="Not authorized to delete this account")
     
@@ -168,30 +215,9 @@ def delete_user_account(user_id: int, current_user: User = Depends(get_current_u
         raise HTTPException(status_code=404, detail="User not found")
 
     try:
-        # Cascade Delete Logic
-        # 1. Handle Provider Profile and dependency chain
-        provider = db.query(Provider).filter(Provider.user_id == user_id).first()
-        if provider:
-            # Delete everything linked to provider's bookings
-            p_booking_ids = [b.id for b in db.query(Booking.id).filter(Booking.provider_id == provider.id).all()]
-            if p_booking_ids:
-                db.query(Review).filter(Review.booking_id.in_(p_booking_ids)).delete(synchronize_session=False)
-                db.query(Complaint).filter(Complaint.booking_id.in_(p_booking_ids)).delete(synchronize_session=False)
-                db.query(Booking).filter(Booking.id.in_(p_booking_ids)).delete(synchronize_session=False)
-            
-            # Delete provider reviews directly
-            db.query(Review).filter(Review.provider_id == provider.id).delete(synchronize_session=False)
-            db.delete(provider)
-        
-        # 2. Handle Customer activity
-        db.query(Review).filter(Review.customer_id == user_id).delete(synchronize_session=False)
-        db.query(Complaint).filter(Complaint.customer_id == user_id).delete(synchronize_session=False)
-        db.query(Booking).filter(Booking.customer_id == user_id).delete(synchronize_session=False)
-        
-        # 3. Final User Deletion
-        db.delete(user)
-        db.commit()
+        with unit_of_work(db):
+            accounts.delete_user(db, user)
+        invalidate_principal(user_id)
         return {"message": "Account deleted successfully"}
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Database deletion failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Booking time slots and conflict detection.
+
+A booking occupies [starts_at, ends_at) on its provider's calendar. On Postgres
+the `bookings_no_overlap` exclusion constraint (migration 7) rejects overlapping
+active bookings inside the INSERT/UPDATE itself, so there is no check-then-act
+window. Other databases fall back to an overlap query before writing.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional, Set, Tuple
+from sqlalchemy import and_, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+try:
+    from .models import Booking
+except (ImportError, ValueError):
+    from models import Booking
+
+# Statuses that hold a provider's time. Must match the exclusion constraint's WHERE clause.
+ACTIVE_STATUSES = ("pending", "confirmed")
+
+SLOT_CONSTRAINT = "bookings_no_overlap"
+
+_DATE_FORMATS = ("%Y-%m-%d",)
+_TIME_FORMATS = ("%H:%M:%S", "%H:%M", "%H:%M:%S.%f")
+
+
+def _parse(value: str, formats) -> Optional[datetime]:
+    for fmt in formats:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
+def parse_date(value) -> Optional[date]:
+    if isinstance(value, date):
+        return value
+    parsed = _parse(value, _DATE_FORMATS)
+    return parsed.date() if parsed else None
+
+
+def parse_time(value) -> Optional[time]:
+    if isinstance(value, time):
+        return value
+    parsed = _parse(value, _TIME_FORMATS)
+    return parsed.time() if parsed else None
+
+
+def slot_bounds(day: date, clock: time, duration_hours) -> Tuple[datetime, datetime]:
+    """[start, end) for a booking on `day` at `clock` lasting `duration_hours` (at least 1)."""
+    start = datetime.combine(day, clock)
+    return start, start + timedelta(hours=max(int(duration_hours or 0), 1))
+
+
+def parse_slot(booking_date, booking_time, duration_hours) -> Optional[Tuple[datetime, datetime]]:
+    """(start, end) from typed values or legacy 'YYYY-MM-DD' + 'HH:MM[:SS]' strings; None if unparseable."""
+    day = parse_date(booking_date)
+    clock = parse_time(booking_time)
+    if day is None or clock is None:
+        return None
+    return slot_bounds(day, clock, duration_hours)
+
+
+def db_enforces_slots(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def slot_taken(db: Session, provider_id: int, start: datetime, end: datetime, exclude_id: Optional[int] = None) -> bool:
+    """Whether another active booking for the provider overlaps [start, end)."""
+    criteria = [
+        Booking.provider_id == provider_id,
+        Booking.status.in_(ACTIVE_STATUSES),
+        Booking.starts_at < end,
+        Booking.ends_at > start,
+    ]
+    if exclude_id is not None:
+        criteria.append(Booking.id != exclude_id)
+    return db.query(exists().where(and_(*criteria))).scalar()
+
+
+def slots_taken(db: Session, booking_ids: Iterable[int]) -> Set[int]:
+    """Of `booking_ids`, those overlapped by another active booking of the same provider (one query)."""
+    booking_ids = list(booking_ids)
+    if not booking_ids:
+        return set()
+    other = aliased(Booking)
+    clash = exists().where(
+        other.provider_id == Booking.provider_id,
+        other.id != Booking.id,
+        other.status.in_(ACTIVE_STATUSES),
+        other.starts_at < Booking.ends_at,
+        other.ends_at > Booking.starts_at,
+    )
+    rows = db.query(Booking.id).filter(Booking.id.in_(booking_ids), Booking.starts_at.isnot(None), clash)
+    return {booking_id for (booking_id,) in rows}
+
+
+def check_slot_free(db: Session, provider_id: int, start: datetime, end: datetime, exclude_id: Optional[int] = None) -> bool:
+    """Pre-write check for databases without the exclusion constraint; always True on Postgres."""
+    if db_enforces_slots(db):
+        return True
+    return not slot_taken(db, provider_id, start, end, exclude_id)
+
+
+def is_slot_conflict(error: IntegrityError) -> bool:
+    orig = getattr(error, "orig", None)
+    # 23P01 = exclusion_violation
+    return getattr(orig, "pgcode", None) == "23P01" or SLOT_CONSTRAINT in str(orig)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Literal
+from datetime import datetime, date, time
 
 # --- Items (Legacy/Test) ---
 class ItemBase(BaseModel):
@@ -53,6 +53,7 @@ class ProviderStatusUpdate(BaseModel):
 class ProviderOut(ProviderBase):
     id: int
     user_id: int
+    city: Optional[str] = None
     background_verified: str
     availability_status: str
     rating: float
@@ -62,25 +63,31 @@ class ProviderOut(ProviderBase):
     class Config:
         from_attributes = True
 
+class ProviderPage(BaseModel):
+    items: List[ProviderOut]
+    next_cursor: Optional[str] = None
+
 # --- Bookings ---
+# Dates and times travel as 'YYYY-MM-DD' and 'HH:MM[:SS]' strings, as before;
+# pydantic parses them on the way in and writes them back out in ISO form.
 class BookingBase(BaseModel):
     provider_id: int
     service_name: str
-    booking_date: str
-    booking_time: str
+    booking_date: date
+    booking_time: time
     duration_hours: int
     address: str
     notes: Optional[str] = None
 
 class BookingUpdate(BaseModel):
     service_name: Optional[str] = None
-    booking_date: Optional[str] = None
-    booking_time: Optional[str] = None
+    booking_date: Optional[date] = None
+    booking_time: Optional[time] = None
     duration_hours: Optional[int] = None
     address: Optional[str] = None
     notes: Optional[str] = None
-    suggested_date: Optional[str] = None
-    suggested_time: Optional[str] = None
+    suggested_date: Optional[date] = None
+    suggested_time: Optional[time] = None
 
 class BookingCreate(BookingBase):
     pass
@@ -94,8 +101,8 @@ class BookingOut(BookingBase):
     commission_amount: Optional[float] = 0.0
     provider_amount: Optional[float] = 0.0
     status: str
-    suggested_date: Optional[str] = None
-    suggested_time: Optional[str] = None
+    suggested_date: Optional[date] = None
+    suggested_time: Optional[time] = None
     refund_status: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -150,4 +157,49 @@ class InquiryOut(InquiryCreate):
     status: str
     created_at: datetime
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+# --- Paginated listings (see pagination.paginate) ---
+class ListPage(BaseModel):
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None  # only on the first page
+    total_is_estimate: bool = False
+
+class AdminUserOut(UserOut):
+    provider_profile: Optional[ProviderOut] = None
+
+class UserPage(ListPage):
+    items: List[UserOut]
+
+class AdminUserPage(ListPage):
+    items: List[AdminUserOut]
+
+class BookingPage(ListPage):
+    items: List[BookingOut]
+
+class ComplaintPage(ListPage):
+    items: List[ComplaintOut]
+
+class InquiryPage(ListPage):
+    items: List[InquiryOut]
+
+# --- Bulk operations ---
+MAX_BULK_IDS = 500
+
+class BulkIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+
+# Every status a booking can be in; stats keeps a bookings_<status> counter for each
+BookingStatus = Literal["pending", "confirmed", "accepted", "completed", "cancelled", "reschedule_requested"]
+
+class BulkStatusUpdate(BulkIds):
+    status: BookingStatus
+
+class BulkItemResult(BaseModel):
+    id: int
+    result: str  # updated, unchanged, not_found, slot_taken
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    requested: int
+    updated: int
+    results: List[BulkItemResult]
@@ -0,0 +1,117 @@
+"""Fast path for large list responses.
+
+`Projection` selects exactly the columns a response schema exposes (nested
+schemas through joined aliases) and builds plain dicts from the result rows,
+so list endpoints skip ORM entity hydration, the identity map and per-row
+pydantic validation. `FastJSONResponse` encodes those dicts with orjson when
+it is installed, and falls back to the standard library otherwise.
+
+Endpoints that still return ORM entities narrow their loads with
+`load_only(*schema_columns(Schema, Model))`, so columns the response never
+shows (and the deferred password hash) stay in the database.
+
+The JSON matches what the response_model path produces: ISO dates and times,
+"Z" for UTC datetimes, null for a missing nested object.
+"""
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, get_args
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_plain, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_plain, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with orjson; returning it bypasses response_model validation."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _nested_schema(annotation) -> Optional[type]:
+    for candidate in get_args(annotation) or (annotation,):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def _scalar_fields(schema: type) -> List[str]:
+    return [name for name, field in schema.model_fields.items() if _nested_schema(field.annotation) is None]
+
+
+def schema_columns(schema: type, entity) -> List:
+    """`entity`'s attributes for the scalar fields of `schema`, for load_only()."""
+    return [getattr(entity, name) for name in _scalar_fields(schema)]
+
+
+class Projection:
+    """The columns of `schema` read from `entity` (a model or an alias), plus nested projections.
+
+    `nested` maps a nested field name (e.g. "user") to the Projection for it;
+    the caller joins those entities into the query (outer joins are fine).
+    Rows are read by position: `columns()` lists this schema's scalar fields,
+    then each nested projection's columns, and `build` walks them in that order.
+    """
+
+    def __init__(self, schema: type, entity, nested: Optional[Dict[str, "Projection"]] = None, prefix: str = ""):
+        self.schema = schema
+        self.entity = entity
+        self.prefix = prefix
+        self._nested = nested or {}
+        self.fields = _scalar_fields(schema)
+        self.children = {
+            name: self._nested[name].with_prefix(f"{prefix}{name}__")
+            for name, field in schema.model_fields.items()
+            if _nested_schema(field.annotation) is not None and name in self._nested
+        }
+        # Nested fields without a projection are emitted as null, like an unloaded relationship
+        self.empty = [
+            name for name, field in schema.model_fields.items()
+            if _nested_schema(field.annotation) is not None and name not in self._nested
+        ]
+        self.width = len(self.fields) + sum(child.width for child in self.children.values())
+        self._id = self.fields.index("id")
+
+    def with_prefix(self, prefix: str) -> "Projection":
+        return Projection(self.schema, self.entity, self._nested, prefix)
+
+    def columns(self) -> List:
+        cols = [getattr(self.entity, name).label(f"{self.prefix}{name}") for name in self.fields]
+        for child in self.children.values():
+            cols.extend(child.columns())
+        return cols
+
+    def build(self, row, offset: int = 0) -> Optional[dict]:
+        """A response dict from one result row; None when an outer-joined entity is missing."""
+        if row[offset + self._id] is None:
+            return None
+        item = dict(zip(self.fields, row[offset:offset + len(self.fields)]))
+        offset += len(self.fields)
+        for name, child in self.children.items():
+            item[name] = child.build(row, offset)
+            offset += child.width
+        for name in self.empty:
+            item[name] = None
+        return item
+
+    def build_all(self, rows) -> List[dict]:
+        return [self.build(row) for row in rows]
@@ -0,0 +1,137 @@
+"""Hour-bucket index of provider busy time (`provider_slots`).
+
+Every active booking is mirrored as one row per hour bucket it touches. Write
+paths call `sync_booking_slots` after changing a booking's time or status, in
+the same transaction. Availability questions then become indexed lookups and
+NOT EXISTS anti-joins against this table.
+"""
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import exists, and_
+from sqlalchemy.orm import Session
+
+try:
+    from .models import ProviderSlot, Booking
+    from .scheduling import ACTIVE_STATUSES
+except (ImportError, ValueError):
+    from models import ProviderSlot, Booking
+    from scheduling import ACTIVE_STATUSES
+
+SLOT = timedelta(hours=1)
+# Bookable hours shown by the availability calendar, [start, end)
+WORKDAY_START_HOUR = int(os.environ.get("WORKDAY_START_HOUR", "8"))
+WORKDAY_END_HOUR = int(os.environ.get("WORKDAY_END_HOUR", "20"))
+MAX_CALENDAR_DAYS = 31
+
+
+def hour_buckets(start: datetime, end: datetime) -> List[datetime]:
+    """Start of every hour bucket overlapping [start, end)."""
+    bucket = start.replace(minute=0, second=0, microsecond=0)
+    buckets = []
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += SLOT
+    return buckets
+
+
+def sync_booking_slots(db: Session, booking: Booking) -> None:
+    """Make the slot rows for `booking` match its current interval and status.
+
+    The booking must already have an id (flush first for new bookings).
+    """
+    db.query(ProviderSlot).filter(ProviderSlot.booking_id == booking.id).delete(synchronize_session=False)
+    if booking.status not in ACTIVE_STATUSES or booking.starts_at is None or booking.ends_at is None:
+        return
+    db.bulk_insert_mappings(ProviderSlot, [
+        {
+            "provider_id": booking.provider_id,
+            "booking_id": booking.id,
+            "slot_date": bucket.date(),
+            "slot_start": bucket,
+        }
+        for bucket in hour_buckets(booking.starts_at, booking.ends_at)
+    ])
+
+
+def resync_bookings(db: Session, booking_ids: List[int]) -> None:
+    """Set-based `sync_booking_slots` for many bookings at once (after a bulk UPDATE)."""
+    if not booking_ids:
+        return
+    db.query(ProviderSlot).filter(ProviderSlot.booking_id.in_(booking_ids)).delete(synchronize_session=False)
+    active = (
+        db.query(Booking.id, Booking.provider_id, Booking.starts_at, Booking.ends_at)
+        .filter(Booking.id.in_(booking_ids), Booking.status.in_(ACTIVE_STATUSES), Booking.starts_at.isnot(None))
+        .all()
+    )
+    db.bulk_insert_mappings(ProviderSlot, [
+        {"provider_id": provider_id, "booking_id": bid, "slot_date": bucket.date(), "slot_start": bucket}
+        for bid, provider_id, starts_at, ends_at in active
+        for bucket in hour_buckets(starts_at, ends_at)
+    ])
+
+
+def busy_at(provider_id_col, start: datetime, end: datetime):
+    """Correlatable EXISTS: the provider has a busy bucket overlapping [start, end)."""
+    return exists().where(and_(
+        ProviderSlot.provider_id == provider_id_col,
+        ProviderSlot.slot_start.in_(hour_buckets(start, end)),
+    ))
+
+
+def busy_on(provider_id_col, day: date):
+    """Correlatable EXISTS: the provider has any busy bucket on `day`."""
+    return exists().where(and_(
+        ProviderSlot.provider_id == provider_id_col,
+        ProviderSlot.slot_date == day,
+    ))
+
+
+def free_slots(db: Session, provider_id: int, start_date: date, end_date: date) -> Dict[date, List[datetime]]:
+    """Free working-hour buckets per day in [start_date, end_date]."""
+    busy = {
+        row.slot_start
+        for row in db.query(ProviderSlot.slot_start).filter(
+            ProviderSlot.provider_id == provider_id,
+            ProviderSlot.slot_date >= start_date,
+            ProviderSlot.slot_date <= end_date,
+        )
+    }
+    calendar = {}
+    day = start_date
+    while day <= end_date:
+        opening = datetime(day.year, day.month, day.day, WORKDAY_START_HOUR)
+        calendar[day] = [
+            opening + SLOT * i
+            for i in range(WORKDAY_END_HOUR - WORKDAY_START_HOUR)
+            if opening + SLOT * i not in busy
+        ]
+        day += timedelta(days=1)
+    return calendar
+
+
+def rebuild(db: Session, batch_size: int = 1000) -> int:
+    """Recreate the whole slot index from bookings. Flushes; the caller commits."""
+    db.query(ProviderSlot).delete(synchronize_session=False)
+    written = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Booking.id, Booking.provider_id, Booking.starts_at, Booking.ends_at)
+            .filter(Booking.id > last_id, Booking.status.in_(ACTIVE_STATUSES), Booking.starts_at.isnot(None))
+            .order_by(Booking.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        rows = [
+            {"provider_id": provider_id, "booking_id": bid, "slot_date": bucket.date(), "slot_start": bucket}
+            for bid, provider_id, starts_at, ends_at in batch
+            for bucket in hour_buckets(starts_at, ends_at)
+        ]
+        db.bulk_insert_mappings(ProviderSlot, rows)
+        db.flush()
+        written += len(rows)
+        last_id = batch[-1][0]
+    return written
@@ -16,6 +16,7 @@ document.addEventListener('DOMContentLoaded', async () => {
 
     await loadStats();
     setupTabs();
+    setupFilters();
 
     // Initial data load
     loadUsers();
@@ -51,6 +52,89 @@ function setupTabs() {
     });
 }
 
+// --- Server-side paginated tables ---
+// Filters are sent as query parameters; "Load more" follows the page's next_cursor.
+function buildQuery(params) {
+    const qs = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') qs.append(key, value);
+    });
+    const str = qs.toString();
+    return str ? `?${str}` : '';
+}
+
+function filterValue(id) {
+    const el = document.getElementById(id);
+    return el ? el.value : '';
+}
+
+async function loadTable(options, cursor = null) {
+    const { endpoint, params, listId, colspan, emptyText, renderRow } = options;
+    const list = document.getElementById(listId);
+    if (!list) return;
+
+    const page = await API.get(endpoint + buildQuery({ ...params, cursor }));
+    if (!cursor) {
+        list.innerHTML = '';
+        list.dataset.loaded = '0';
+        list.dataset.total = page.total ?? '';
+        list.dataset.estimate = page.total_is_estimate ? '1' : '';
+    }
+
+    if (!cursor && page.items.length === 0) {
+        list.innerHTML = `<tr><td colspan="${colspan}" style="text-align:center; padding:20px; color:#64748b;">${emptyText}</td></tr>`;
+    }
+    page.items.forEach(item => list.appendChild(renderRow(item)));
+    list.dataset.loaded = String(Number(list.dataset.loaded) + page.items.length);
+
+    renderPager(list, page.next_cursor, () => loadTable(options, page.next_cursor));
+}
+
+function renderPager(list, nextCursor, loadMore) {
+    const card = list.closest('.data-card') || list.parentElement;
+    let pager = document.getElementById(`${list.id}Pager`);
+    if (!pager) {
+        pager = document.createElement('div');
+        pager.id = `${list.id}Pager`;
+        pager.style.cssText = 'display:flex; justify-content:space-between; align-items:center; padding:12px 16px; color:#64748b; font-size:0.85rem;';
+        card.appendChild(pager);
+    }
+
+    const total = list.dataset.total;
+    const totalText = total === '' ? '' : ` of ${list.dataset.estimate ? '~' : ''}${Number(total).toLocaleString()}`;
+    pager.innerHTML = `<span>Showing ${Number(list.dataset.loaded).toLocaleString()}${totalText}</span>`;
+
+    if (nextCursor) {
+        const btn = document.createElement('button');
+        btn.className = 'btn-small';
+        btn.style.cssText = 'background:#475569; color:white;';
+        btn.textContent = 'Load more';
+        btn.addEventListener('click', async () => {
+            btn.disabled = true;
+            btn.textContent = 'Loading...';
+            try {
+                await loadMore();
+            } catch (err) {
+                btn.disabled = false;
+                btn.textContent = 'Load more';
+                alert(err.message);
+            }
+        });
+        pager.appendChild(btn);
+    }
+}
+
+function setupFilters() {
+    const bind = (ids, reload) => ids.forEach(id => {
+        const el = document.getElementById(id);
+        if (el) el.addEventListener('change', reload);
+    });
+    bind(['bookingStatusFilter', 'bookingFromFilter', 'bookingToFilter'], loadBookings);
+    bind(['complaintStatusFilter'], loadComplaints);
+    bind(['inquiryStatusFilter'], loadInquiries);
+    bind(['providerSortFilter'], loadProviders);
+}
+
 async function loadStats() {
     try {
         const stats = await API.get('/admin/dashboard');
@@ -66,34 +150,29 @@ async function loadStats() {
 
 async function loadUsers() {
     try {
-        const users = await API.get('/admin/users');
-        const list = document.getElementById('usersList');
-        if (!list) return;
-        list.innerHTML = '';
-
-        const customers = users.filter(u => u.role === 'customer' || u.role === 'admin');
-
-        if (customers.length === 0) {
-            list.innerHTML = '<tr><td colspan="6" style="text-align:center; padding:20px; color:#64748b;">No customers found</td></tr>';
-            return;
-        }
+        await loadTable({
+            endpoint: '/admin/users',
+            params: { role: 'customer,admin' },
+            listId: 'usersList',
+            colspan: 6,
+            emptyText: 'No customers found',
+            renderRow: u => {
+                const row = document.createElement('tr');
+                let actionBtns = '';
+                if (u.role !== 'admin') {
+                    actionBtns += `<button class="btn-small" onclick="deleteUser(${u.id})" style="background:#ef4444; color:white;">Delete</button>`;
+                }
 
-        customers.forEach(u => {
-            const row = document.createElement('tr');
-            let actionBtns = '';
-            if (u.role !== 'admin') {
-                actionBtns += `<button class="btn-small" onclick="deleteUser(${u.id})" style="background:#ef4444; color:white;">Delete</button>`;
+                row.innerHTML = `
+                    <td>${u.id}</td>
+                    <td>${u.name}</td>
+                    <td>${u.email}</td>
+                    <td><span class="badge ${u.role === 'admin' ? 'completed' : 'pending'}">${u.role}</span></td>
+                    <td>${new Date(u.created_at).toLocaleDateString()}</td>
+                    <td><div style="display:flex;">${actionBtns || '-'}</div></td>
+                `;
+                return row;
             }
-
-            row.innerHTML = `
-                <td>${u.id}</td>
-                <td>${u.name}</td>
-                <td>${u.email}</td>
-                <td><span class="badge ${u.role === 'admin' ? 'completed' : 'pending'}">${u.role}</span></td>
-                <td>${new Date(u.created_at).toLocaleDateString()}</td>
-                <td><div style="display:flex;">${actionBtns || '-'}</div></td>
-            `;
-            list.appendChild(row);
         });
     } catch (err) {
         console.error('Failed to load users', err);
@@ -102,41 +181,36 @@ async function loadUsers() {
 
 async function loadProviders() {
     try {
-        const users = await API.get('/admin/users');
-        const list = document.getElementById('providersList');
-        if (!list) return;
-        list.innerHTML = '';
-
-        const providers = users.filter(u => u.role === 'provider');
-
-        if (providers.length === 0) {
-            list.innerHTML = '<tr><td colspan="6" style="text-align:center; padding:20px; color:#64748b;">No providers found</td></tr>';
-            return;
-        }
+        await loadTable({
+            endpoint: '/admin/users',
+            params: { role: 'provider', sort: filterValue('providerSortFilter') },
+            listId: 'providersList',
+            colspan: 6,
+            emptyText: 'No providers found',
+            renderRow: u => {
+                const row = document.createElement('tr');
+                const p = u.provider_profile;
+
+                let actionBtns = '';
+                if (p?.background_verified === 'pending') {
+                    actionBtns += `<button class="btn-small" onclick="viewProfile(${p.id}, true)" style="background:#475569; color:white; margin-right:5px;">Inspect</button>`;
+                    actionBtns += `<button class="btn-small" onclick="verifyProvider(${p.id})" style="background:#2563eb; color:white; margin-right:5px;">Verify</button>`;
+                }
+                actionBtns += `<button class="btn-small" onclick="deleteUser(${u.id})" style="background:#ef4444; color:white;">Delete</button>`;
 
-        providers.forEach(u => {
-            const row = document.createElement('tr');
-            const p = u.provider_profile;
+                let info = `<div><strong>${p?.service_type || 'N/A'}</strong></div>
+                            <div style="font-size:0.8rem; color:#94a3b8;">${p?.address || 'No address'}</div>`;
 
-            let actionBtns = '';
-            if (p?.background_verified === 'pending') {
-                actionBtns += `<button class="btn-small" onclick="viewProfile(${p.id}, true)" style="background:#475569; color:white; margin-right:5px;">Inspect</button>`;
-                actionBtns += `<button class="btn-small" onclick="verifyProvider(${p.id})" style="background:#2563eb; color:white; margin-right:5px;">Verify</button>`;
+                row.innerHTML = `
+                    <td>${u.id}</td>
+                    <td>${u.name}<br><small>${u.email}</small></td>
+                    <td>${info}</td>
+                    <td><span class="badge ${p?.background_verified === 'verified' ? 'confirmed' : 'pending'}">${p?.background_verified || 'N/A'}</span></td>
+                    <td>${new Date(u.created_at).toLocaleDateString()}</td>
+                    <td><div style="display:flex;">${actionBtns}</div></td>
+                `;
+                return row;
             }
-            actionBtns += `<button class="btn-small" onclick="deleteUser(${u.id})" style="background:#ef4444; color:white;">Delete</button>`;
-
-            let info = `<div><strong>${p?.service_type || 'N/A'}</strong></div>
-                        <div style="font-size:0.8rem; color:#94a3b8;">${p?.address || 'No address'}</div>`;
-
-            row.innerHTML = `
-                <td>${u.id}</td>
-                <td>${u.name}<br><small>${u.email}</small></td>
-                <td>${info}</td>
-                <td><span class="badge ${p?.background_verified === 'verified' ? 'confirmed' : 'pending'}">${p?.background_verified || 'N/A'}</span></td>
-                <td>${new Date(u.created_at).toLocaleDateString()}</td>
-                <td><div style="display:flex;">${actionBtns}</div></td>
-            `;
-            list.appendChild(row);
         });
     } catch (err) {
         console.error('Failed to load providers', err);
@@ -157,32 +231,59 @@ async function deleteUser(userId) {
 
 async function loadBookings() {
     try {
-        const bookings = await API.get('/admin/bookings');
-        const list = document.getElementById('bookingsList');
-        list.innerHTML = '';
-
-        if (bookings.length === 0) {
-            list.innerHTML = '<tr><td colspan="5" style="text-align:center; padding:20px; color:#64748b;">No bookings found</td></tr>';
-            return;
-        }
-
-        bookings.forEach(b => {
-            const row = document.createElement('tr');
-
-            row.innerHTML = `
-                <td>${b.id}</td>
-                <td>${b.service_name}</td>
-                <td>${b.booking_date}</td>
-                <td><span class="badge ${b.status}">${b.status}</span></td>
-                <td>₹${b.total_amount}</td>
-            `;
-            list.appendChild(row);
+        await loadTable({
+            endpoint: '/admin/bookings',
+            params: {
+                status: filterValue('bookingStatusFilter'),
+                date_from: filterValue('bookingFromFilter'),
+                date_to: filterValue('bookingToFilter')
+            },
+            listId: 'bookingsList',
+            colspan: 5,
+            emptyText: 'No bookings found',
+            renderRow: b => {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${b.id}</td>
+                    <td>${b.service_name}</td>
+                    <td>${b.booking_date}</td>
+                    <td><span class="badge ${b.status}">${b.status}</span></td>
+                    <td>₹${b.total_amount}</td>
+                `;
+                return row;
+            }
         });
     } catch (err) {
         console.error('Failed to load bookings', err);
     }
 }
 
+async function exportBookings(format) {
+    // Streamed download of every matching booking, not just the loaded pages.
+    // Fetched rather than navigated to, so the admin's token goes along.
+    const query = buildQuery({
+        format,
+        status: filterValue('bookingStatusFilter'),
+        date_from: filterValue('bookingFromFilter'),
+        date_to: filterValue('bookingToFilter')
+    });
+    try {
+        const response = await fetch(`${API_BASE_URL}/admin/exports/bookings${query}`, {
+            headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` }
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        const disposition = response.headers.get('content-disposition') || '';
+        const match = disposition.match(/filename="([^"]+)"/);
+        const link = document.createElement('a');
+        link.href = URL.createObjectURL(await response.blob());
+        link.download = match ? match[1] : `bookings.${format}`;
+        link.click();
+        URL.revokeObjectURL(link.href);
+    } catch (err) {
+        alert('Export failed: ' + err.message);
+    }
+}
+
 async function verifyProvider(providerId) {
     if (!providerId) return alert('Not a provider');
     if (!confirm('Verify this provider?')) return;
@@ -197,44 +298,41 @@ async function verifyProvider(providerId) {
 
 async function loadComplaints() {
     try {
-        const complaints = await API.get('/complaints');
-        const list = document.getElementById('complaintsList');
-        if (!list) return;
-        list.innerHTML = '';
-
-        if (complaints.length === 0) {
-            list.innerHTML = '<tr><td colspan="5" style="text-align:center; padding:20px; color:#64748b;">No complaints found</td></tr>';
-            return;
-        }
-
-        complaints.forEach(c => {
-            const row = document.createElement('tr');
-            let actions = '';
+        await loadTable({
+            endpoint: '/complaints',
+            params: { status: filterValue('complaintStatusFilter') },
+            listId: 'complaintsList',
+            colspan: 5,
+            emptyText: 'No complaints found',
+            renderRow: c => {
+                const row = document.createElement('tr');
+                let actions = '';
+
+                if (c.status === 'pending') {
+                    actions = `
+                        <button class="btn-small" onclick="investigateComplaint(${c.id})" style="background:#f59e0b; color:white; margin-right:2px;">Check</button>
+                        <button class="btn-small" onclick="refundComplaint(${c.id})" style="background:#2563eb; color:white; margin-right:2px;">Refund</button>
+                        <button class="btn-small" onclick="warnProvider(${c.id})" style="background:#ef4444; color:white; margin-right:2px;">Warn</button>
+                    `;
+                } else if (c.status === 'investigating') {
+                    actions = `
+                        <button class="btn-small" onclick="refundComplaint(${c.id})" style="background:#2563eb; color:white; margin-right:2px;">Refund</button>
+                        <button class="btn-small" onclick="warnProvider(${c.id})" style="background:#ef4444; color:white; margin-right:2px;">Warn</button>
+                        <button class="btn-small" onclick="resolveComplaint(${c.id})" style="background:#166534; color:white;">Resolve</button>
+                    `;
+                } else {
+                    actions = `<span style="font-size:0.8rem; color:#64748b;">${c.resolution || 'No notes'}</span>`;
+                }
 
-            if (c.status === 'pending') {
-                actions = `
-                    <button class="btn-small" onclick="investigateComplaint(${c.id})" style="background:#f59e0b; color:white; margin-right:2px;">Check</button>
-                    <button class="btn-small" onclick="refundComplaint(${c.id})" style="background:#2563eb; color:white; margin-right:2px;">Refund</button>
-                    <button class="btn-small" onclick="warnProvider(${c.id})" style="background:#ef4444; color:white; margin-right:2px;">Warn</button>
+                row.innerHTML = `
+                    <td>${c.id}</td>
+                    <td>Booking #${c.booking_id}</td>
+                    <td><strong>${c.subject}</strong><br><small>${c.description}</small></td>
+                    <td><span class="badge ${c.status}">${c.status}</span></td>
+                    <td><div style="display:flex; flex-wrap:wrap;">${actions}</div></td>
                 `;
-            } else if (c.status === 'investigating') {
-                actions = `
-                    <button class="btn-small" onclick="refundComplaint(${c.id})" style="background:#2563eb; color:white; margin-right:2px;">Refund</button>
-                    <button class="btn-small" onclick="warnProvider(${c.id})" style="background:#ef4444; color:white; margin-right:2px;">Warn</button>
-                    <button class="btn-small" onclick="resolveComplaint(${c.id})" style="background:#166534; color:white;">Resolve</button>
-                `;
-            } else {
-                actions = `<span style="font-size:0.8rem; color:#64748b;">${c.resolution || 'No notes'}</span>`;
+                return row;
             }
-
-            row.innerHTML = `
-                <td>${c.id}</td>
-                <td>Booking #${c.booking_id}</td>
-                <td><strong>${c.subject}</strong><br><small>${c.description}</small></td>
-                <td><span class="badge ${c.status}">${c.status}</span></td>
-                <td><div style="display:flex; flex-wrap:wrap;">${actions}</div></td>
-            `;
-            list.appendChild(row);
         });
     } catch (err) {
         console.error('Failed to load complaints', err);
@@ -291,26 +389,23 @@ async function resolveComplaint(id) {
 
 async function loadInquiries() {
     try {
-        const inquiries = await API.get('/inquiries');
-        const list = document.getElementById('inquiriesList');
-        if (!list) return;
-        list.innerHTML = '';
-
-        if (inquiries.length === 0) {
-            list.innerHTML = '<tr><td colspan="5" style="text-align:center; padding:20px; color:#64748b;">No inquiries found</td></tr>';
-            return;
-        }
-
-        inquiries.forEach(i => {
-            const row = document.createElement('tr');
-            row.innerHTML = `
-                <td>${new Date(i.created_at).toLocaleDateString()}</td>
-                <td>${i.name} (${i.email})</td>
-                <td><strong>${i.subject}</strong></td>
-                <td>${i.message}</td>
-                <td><span class="badge ${i.status}">${i.status}</span></td>
-            `;
-            list.appendChild(row);
+        await loadTable({
+            endpoint: '/inquiries',
+            params: { status: filterValue('inquiryStatusFilter') },
+            listId: 'inquiriesList',
+            colspan: 5,
+            emptyText: 'No inquiries found',
+            renderRow: i => {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${new Date(i.created_at).toLocaleDateString()}</td>
+                    <td>${i.name} (${i.email})</td>
+                    <td><strong>${i.subject}</strong></td>
+                    <td>${i.message}</td>
+                    <td><span class="badge ${i.status}">${i.status}</span></td>
+                `;
+                return row;
+            }
         });
     } catch (err) {
         console.error('Failed to load inquiries', err);
@@ -328,4 +423,5 @@ window.warnProvider = warnProvider;
 window.resolveComplaint = resolveComplaint;
 window.verifyProvider = verifyProvider;
 window.deleteUser = deleteUser;
+window.exportBookings = exportBookings;
 window.viewProfile = viewProfile; // Fix for Inspect button
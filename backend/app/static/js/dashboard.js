@@ -186,12 +186,15 @@ async function loadCustomerDashboard(userId) {
     try {
         const results = await Promise.allSettled([
             API.get(`/bookings/customer/${userId}`),
-            API.get('/providers/')
+            API.get('/providers/'),
+            API.get('/services/stats')
         ]);
 
         const bookings = results[0].status === 'fulfilled' ? results[0].value : [];
         currentBookings = bookings;
-        const providers = results[1].status === 'fulfilled' ? results[1].value : [];
+        const providers = results[1].status === 'fulfilled' ? (results[1].value.items || []) : [];
+        // The listing is one keyset page; the platform-wide count comes from the running counters
+        const activeProviders = results[2].status === 'fulfilled' ? (results[2].value.active_providers ?? '-') : '-';
 
         // 1. Stats Overview
         const pending = bookings.filter(b => b.status === 'pending').length;
@@ -201,7 +204,7 @@ async function loadCustomerDashboard(userId) {
 
         document.getElementById('stat-pending-bookings').textContent = pending;
         document.getElementById('stat-confirmed-bookings').textContent = confirmed;
-        document.getElementById('stat-active-providers').textContent = providers.length;
+        document.getElementById('stat-active-providers').textContent = activeProviders;
         document.getElementById('stat-monthly-spend').textContent = `₹${monthlySpend.toLocaleString()}`;
 
         // 2. Recent Bookings (Overview Tab)
@@ -13,8 +13,7 @@ document.addEventListener('DOMContentLoaded', async () => {
 
     try {
         // 1. Get Provider Profile
-        const providers = await API.get('/providers/');
-        const myProfile = providers.find(p => p.user_id === user.id);
+        const myProfile = await API.get(`/providers/profile/${user.id}`).catch(() => null);
 
         if (myProfile) {
             providerId = myProfile.id;
@@ -123,7 +123,7 @@ function updateNavAuth() {
     }
 }
 
-async function loadProviders(serviceType, filters = {}) {
+async function loadProviders(serviceType, filters = {}, cursor = null) {
     try {
         let query = `/providers/?service_type=${serviceType}`;
 
@@ -133,15 +133,22 @@ async function loadProviders(serviceType, filters = {}) {
         if (filters.min_experience) query += `&min_experience=${filters.min_experience}`;
         if (filters.booking_date) query += `&booking_date=${filters.booking_date}`;
         if (filters.sort_by) query += `&sort_by=${filters.sort_by}`;
+        if (cursor) query += `&cursor=${encodeURIComponent(cursor)}`;
 
         console.log('Final API Request Query:', query);
-        const providers = await API.get(query);
-        console.log('API Response:', providers);
+        const page = await API.get(query);
+        console.log('API Response:', page);
         const container = document.querySelector('.providers-list');
         const countText = document.querySelector('.providers-count');
 
         if (!container) return;
-        container.innerHTML = '';
+
+        // A cursor means we are appending the next page to the current list
+        const previous = cursor ? container.querySelectorAll('.provider-card').length : 0;
+        const providers = page.items || [];
+        if (!cursor) container.innerHTML = '';
+        const oldMore = container.querySelector('.load-more-btn');
+        if (oldMore) oldMore.remove();
 
         if (countText) {
             let filterDesc = [];
@@ -149,11 +156,12 @@ async function loadProviders(serviceType, filters = {}) {
             if (filters.min_price) filterDesc.push(`above ₹${filters.min_price}`);
 
             const descStr = filterDesc.length > 0 ? ` ${filterDesc.join(', ')}` : '';
-            countText.textContent = `${providers.length} providers found${descStr}`;
-            console.log(`[Providers] Loaded ${providers.length} results${descStr}`);
+            const shown = previous + providers.length;
+            countText.textContent = `${shown}${page.next_cursor ? '+' : ''} providers found${descStr}`;
+            console.log(`[Providers] Loaded ${shown} results${descStr}`);
         }
 
-        if (providers.length === 0) {
+        if (providers.length === 0 && !cursor) {
             container.innerHTML = '<div style="text-align:center; padding: 40px; color: #666;"><h3>No providers found</h3><p>Try adjusting your filters to find more results.</p></div>';
             return;
         }
@@ -163,6 +171,14 @@ async function loadProviders(serviceType, filters = {}) {
             container.appendChild(card);
         });
 
+        if (page.next_cursor) {
+            const more = document.createElement('button');
+            more.className = 'btn-apply-filters load-more-btn';
+            more.textContent = 'Load more';
+            more.onclick = () => loadProviders(serviceType, filters, page.next_cursor);
+            container.appendChild(more);
+        }
+
     } catch (err) {
         console.error('Failed to load providers:', err);
     }
@@ -0,0 +1,258 @@
+"""Running platform counters for the admin dashboard and landing page.
+
+Write paths call `bump` / `booking_status_changed` inside their own transaction,
+so the counters commit (or roll back) together with the change they describe.
+Reads go through `get_stats`, a short TTL cache over the `platform_stats` rows.
+`reconcile` recomputes everything from the source tables if counters drift.
+
+The per-provider running totals (providers.total_bookings / earnings) follow the
+same rules: single-statement `SET x = x + :delta` updates in the booking's
+transaction, never read-modify-write on a loaded object; `reconcile_providers`
+rebuilds them from `bookings`.
+"""
+import os
+import time
+import threading
+from typing import Dict, get_args
+from sqlalchemy import func, update, insert, select, or_, and_
+from sqlalchemy.orm import Session
+
+try:
+    from .models import PlatformStat, User, Provider, Booking
+    from .schemas import BookingStatus
+except (ImportError, ValueError):
+    from models import PlatformStat, User, Provider, Booking
+    from schemas import BookingStatus
+
+BOOKING_STATUSES = list(get_args(BookingStatus))
+
+CACHE_TTL_SECONDS = float(os.environ.get("STATS_CACHE_TTL", "30"))
+
+_cache_lock = threading.Lock()
+_cache = {"at": 0.0, "values": None}
+
+
+def _status_key(status) -> str:
+    return f"bookings_{status or 'pending'}"
+
+
+def invalidate_cache() -> None:
+    with _cache_lock:
+        _cache["values"] = None
+
+
+def bump(db: Session, **deltas: float) -> None:
+    """Add each delta to its counter with a single-statement UPDATE (insert if new)."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        result = db.execute(
+            update(PlatformStat)
+            .where(PlatformStat.key == key)
+            .values(value=PlatformStat.value + delta)
+        )
+        if result.rowcount == 0:
+            db.execute(insert(PlatformStat).values(key=key, value=delta))
+    invalidate_cache()
+
+
+def booking_created(db: Session, booking: Booking) -> None:
+    bump(db, **{"bookings": 1, _status_key(booking.status): 1})
+
+
+def status_change_deltas(old_status: str, new_status: str, total: float, commission: float, deltas=None) -> Dict[str, float]:
+    """Counter deltas for one booking moving between statuses, added into `deltas` if given."""
+    deltas = {} if deltas is None else deltas
+    if old_status == new_status:
+        return deltas
+
+    def add(key, value):
+        deltas[key] = deltas.get(key, 0) + value
+
+    add(_status_key(old_status), -1)
+    add(_status_key(new_status), 1)
+    if old_status == "completed":
+        add("total_sales", -(total or 0.0))
+        add("platform_revenue", -(commission or 0.0))
+    if new_status == "completed":
+        add("total_sales", total or 0.0)
+        add("platform_revenue", commission or 0.0)
+    return deltas
+
+
+def booking_status_changed(db: Session, booking: Booking, old_status: str, new_status: str) -> None:
+    """Move a booking between status buckets and keep completed-revenue totals in step.
+
+    Also moves the provider's payout in or out of providers.earnings when the
+    booking enters or leaves "completed" (set provider_amount first).
+    """
+    if old_status == new_status:
+        return
+    bump(db, **status_change_deltas(old_status, new_status, booking.total_amount, booking.commission_amount))
+    if new_status == "completed":
+        provider_counters(db, booking.provider_id, earnings=booking.provider_amount or 0.0)
+    elif old_status == "completed":
+        provider_counters(db, booking.provider_id, earnings=-(booking.provider_amount or 0.0))
+
+
+def user_created(db: Session, role: str) -> None:
+    deltas = {"users": 1}
+    if role == "customer":
+        deltas["customers"] = 1
+    elif role == "provider":
+        deltas["providers"] = 1
+    bump(db, **deltas)
+
+
+def user_deleted(db: Session, user: User, provider, booking_filter) -> None:
+    """Account for a user, their provider profile and the bookings matching `booking_filter` going away."""
+    deltas = {"users": -1}
+    if user.role == "customer":
+        deltas["customers"] = -1
+    if provider is not None:
+        deltas["providers"] = -1
+
+    rows = db.query(
+        Booking.status,
+        func.count(Booking.id),
+        func.coalesce(func.sum(Booking.total_amount), 0.0),
+        func.coalesce(func.sum(Booking.commission_amount), 0.0),
+    ).filter(booking_filter).group_by(Booking.status).all()
+    for status, count, total, commission in rows:
+        deltas["bookings"] = deltas.get("bookings", 0) - count
+        deltas[_status_key(status)] = deltas.get(_status_key(status), 0) - count
+        if status == "completed":
+            deltas["total_sales"] = -float(total)
+            deltas["platform_revenue"] = -float(commission)
+    bump(db, **deltas)
+
+    # Other providers lose the deleted customer's bookings with them; the deleted
+    # provider's own row goes away with the cascade
+    if provider is not None:
+        booking_filter = and_(booking_filter, Booking.provider_id != provider.id)
+    provider_counters_for_bookings(db, booking_filter, sign=-1)
+
+
+def provider_counters(db: Session, provider_id: int, bookings: int = 0, earnings: float = 0.0) -> None:
+    """Atomically add to one provider's total_bookings / earnings."""
+    values = {}
+    if bookings:
+        values["total_bookings"] = func.coalesce(Provider.total_bookings, 0) + bookings
+    if earnings:
+        values["earnings"] = func.coalesce(Provider.earnings, 0.0) + earnings
+    if values:
+        db.execute(
+            update(Provider).where(Provider.id == provider_id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def provider_earnings_for_bookings(db: Session, booking_ids, sign: int = 1) -> None:
+    """Add (or with sign=-1 remove) the provider_amount of `booking_ids` to their providers' earnings, set-based."""
+    if not booking_ids:
+        return
+    amount = (
+        select(func.coalesce(func.sum(Booking.provider_amount), 0.0))
+        .where(Booking.provider_id == Provider.id, Booking.id.in_(booking_ids))
+        .scalar_subquery()
+    )
+    affected = select(Booking.provider_id).where(Booking.id.in_(booking_ids))
+    db.execute(
+        update(Provider).where(Provider.id.in_(affected))
+        .values(earnings=func.coalesce(Provider.earnings, 0.0) + sign * amount)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def provider_counters_for_bookings(db: Session, booking_filter, sign: int = 1) -> None:
+    """Add (or with sign=-1 remove) the bookings matching `booking_filter` to their providers'
+    total_bookings and completed earnings, one grouped UPDATE for all affected providers."""
+    booking_count = (
+        select(func.count(Booking.id))
+        .where(Booking.provider_id == Provider.id, booking_filter)
+        .scalar_subquery()
+    )
+    earned = (
+        select(func.coalesce(func.sum(Booking.provider_amount), 0.0))
+        .where(Booking.provider_id == Provider.id, Booking.status == "completed", booking_filter)
+        .scalar_subquery()
+    )
+    affected = select(Booking.provider_id).where(booking_filter)
+    db.execute(
+        update(Provider).where(Provider.id.in_(affected))
+        .values(
+            total_bookings=func.coalesce(Provider.total_bookings, 0) + sign * booking_count,
+            earnings=func.coalesce(Provider.earnings, 0.0) + sign * earned,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_stats(db: Session) -> Dict[str, float]:
+    """All counters as a dict, served from cache for up to CACHE_TTL_SECONDS."""
+    now = time.monotonic()
+    with _cache_lock:
+        if _cache["values"] is not None and now - _cache["at"] < CACHE_TTL_SECONDS:
+            return _cache["values"]
+
+    values = {key: value for key, value in db.query(PlatformStat.key, PlatformStat.value).all()}
+    with _cache_lock:
+        _cache["values"] = values
+        _cache["at"] = now
+    return values
+
+
+def reconcile(db: Session) -> Dict[str, float]:
+    """Recompute every counter from the source tables and overwrite the stored values.
+
+    Flushes but does not commit; the caller owns the transaction.
+    """
+    values = {key: 0.0 for key in ["users", "customers", "providers", "bookings", "total_sales", "platform_revenue"]}
+    values.update({_status_key(s): 0.0 for s in BOOKING_STATUSES})
+
+    values["users"] = db.query(func.count(User.id)).scalar() or 0
+    values["customers"] = db.query(func.count(User.id)).filter(User.role == "customer").scalar() or 0
+    values["providers"] = db.query(func.count(Provider.id)).scalar() or 0
+
+    rows = db.query(
+        Booking.status,
+        func.count(Booking.id),
+        func.coalesce(func.sum(Booking.total_amount), 0.0),
+        func.coalesce(func.sum(Booking.commission_amount), 0.0),
+    ).group_by(Booking.status).all()
+    for status, count, total, commission in rows:
+        values["bookings"] += count
+        values[_status_key(status)] = values.get(_status_key(status), 0.0) + count
+        if status == "completed":
+            values["total_sales"] = float(total)
+            values["platform_revenue"] = float(commission)
+
+    for key, value in values.items():
+        db.merge(PlatformStat(key=key, value=float(value)))
+    db.flush()
+    invalidate_cache()
+    return values
+
+
+def reconcile_providers(db: Session) -> int:
+    """Rewrite providers.total_bookings / earnings from `bookings` where they drifted.
+
+    total_bookings counts every booking the provider has; earnings sums provider_amount
+    over completed ones. Returns how many providers were corrected. Does not commit.
+    """
+    booking_count = select(func.count(Booking.id)).where(Booking.provider_id == Provider.id).scalar_subquery()
+    earned = (
+        select(func.coalesce(func.sum(Booking.provider_amount), 0.0))
+        .where(Booking.provider_id == Provider.id, Booking.status == "completed")
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(Provider)
+        .where(or_(
+            Provider.total_bookings.is_distinct_from(booking_count),
+            func.abs(func.coalesce(Provider.earnings, 0.0) - earned) > 0.005,
+        ))
+        .values(total_bookings=booking_count, earnings=earned)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
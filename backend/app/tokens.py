@@ -0,0 +1,186 @@
+"""HS256 JWT signing and verification with precomputed per-key state.
+
+Every authenticated request verifies a token, so the constant work is done once
+per key at startup: the base64 header segment is prebuilt and the keyed HMAC
+inner/outer hash states are kept and copied per call instead of being rebuilt
+from the secret. Signatures are compared as raw bytes.
+
+Keys rotate through the `kid` header. Configure them with
+
+    JWT_KEYS="2024-06:first-secret,2025-01:second-secret"
+    JWT_ACTIVE_KID="2025-01"
+
+Every listed key verifies; only the active one signs. Without JWT_KEYS the
+single signing key is SECRET_KEY; with neither set the app refuses to start.
+
+Tokens issued before `kid` existed (no kid in the header) verify only when
+JWT_LEGACY_SECRET is set explicitly; unset or empty turns them off. They must
+carry an `exp`, and JWT_LEGACY_UNTIL (unix seconds) stops accepting them
+altogether after that time.
+"""
+import os
+import json
+import hmac
+import time
+import base64
+import hashlib
+import binascii
+from typing import Dict, Optional
+
+
+class TokenError(Exception):
+    """Token is malformed, unsigned by a known key, or has a bad signature."""
+
+
+class TokenExpired(TokenError):
+    pass
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+_BLOCK_SIZE = hashlib.sha256().block_size
+_IPAD = bytes(x ^ 0x36 for x in range(256))
+_OPAD = bytes(x ^ 0x5C for x in range(256))
+
+
+def _header_segment(header: dict) -> str:
+    return b64url_encode(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+
+
+class _SigningKey:
+    __slots__ = ("kid", "header_b64", "_inner", "_outer")
+
+    def __init__(self, kid: Optional[str], secret: bytes, header_b64: str):
+        self.kid = kid
+        self.header_b64 = header_b64
+        # HMAC (RFC 2104) with the padded-key blocks already absorbed: each call only
+        # copies two C-level hash states instead of redoing the key schedule.
+        if len(secret) > _BLOCK_SIZE:
+            secret = hashlib.sha256(secret).digest()
+        secret = secret.ljust(_BLOCK_SIZE, b"\0")
+        self._inner = hashlib.sha256(secret.translate(_IPAD))
+        self._outer = hashlib.sha256(secret.translate(_OPAD))
+
+    def digest(self, signing_input: bytes) -> bytes:
+        inner = self._inner.copy()
+        inner.update(signing_input)
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return outer.digest()
+
+
+class TokenCodec:
+    def __init__(self, keys: Dict[str, bytes], active_kid: str, legacy_secret: Optional[bytes] = None,
+                 legacy_until: Optional[float] = None):
+        if active_kid not in keys:
+            raise ValueError(f"Active key id '{active_kid}' is not among the configured keys")
+
+        self._by_kid = {
+            kid: _SigningKey(kid, secret, _header_segment({"alg": "HS256", "typ": "JWT", "kid": kid}))
+            for kid, secret in keys.items()
+        }
+        self._active = self._by_kid[active_kid]
+
+        # Fast path: our own header segments map straight to their key, no JSON decode
+        self._by_header = {key.header_b64: key for key in self._by_kid.values()}
+        self._legacy_until = legacy_until
+        if legacy_secret:
+            # The original encoder used json.dumps defaults (spaces after separators)
+            legacy_header = b64url_encode(json.dumps({"alg": "HS256", "typ": "JWT"}).encode("utf-8"))
+            self._by_header[legacy_header] = _SigningKey(None, legacy_secret, legacy_header)
+
+    @property
+    def active_kid(self) -> str:
+        return self._active.kid
+
+    def encode(self, payload: dict) -> str:
+        key = self._active
+        payload_b64 = b64url_encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        signing_input = f"{key.header_b64}.{payload_b64}"
+        signature = key.digest(signing_input.encode("ascii"))
+        return f"{signing_input}.{b64url_encode(signature)}"
+
+    def _key_for_header(self, header_b64: str) -> _SigningKey:
+        key = self._by_header.get(header_b64)
+        if key is not None:
+            return key
+        # Someone else's serialization of a header we may still accept
+        try:
+            header = json.loads(b64url_decode(header_b64))
+        except (ValueError, binascii.Error):
+            raise TokenError("Malformed token header")
+        if not isinstance(header, dict) or header.get("alg") != "HS256":
+            raise TokenError("Unsupported token algorithm")
+        key = self._by_kid.get(header.get("kid"))
+        if key is None:
+            raise TokenError("Unknown signing key")
+        return key
+
+    def decode(self, token: str, now: Optional[float] = None) -> dict:
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+        except ValueError:
+            raise TokenError("Invalid token format")
+
+        key = self._key_for_header(header_b64)
+        try:
+            signature = b64url_decode(signature_b64)
+        except (ValueError, binascii.Error):
+            raise TokenError("Malformed token signature")
+
+        expected = key.digest(f"{header_b64}.{payload_b64}".encode("ascii"))
+        if not hmac.compare_digest(signature, expected):
+            raise TokenError("Invalid token signature")
+
+        try:
+            payload = json.loads(b64url_decode(payload_b64))
+        except (ValueError, binascii.Error):
+            raise TokenError("Malformed token payload")
+        if not isinstance(payload, dict):
+            raise TokenError("Malformed token payload")
+
+        now = time.time() if now is None else now
+        exp = payload.get("exp")
+        if key.kid is None:
+            if self._legacy_until is not None and now >= self._legacy_until:
+                raise TokenError("Legacy tokens are no longer accepted")
+            if not isinstance(exp, (int, float)):
+                raise TokenError("Legacy token without expiry")
+        if exp is not None and exp < now:
+            raise TokenExpired("Token expired")
+        return payload
+
+
+def load_codec_from_env() -> TokenCodec:
+    spec = os.environ.get("JWT_KEYS", "").strip()
+    if spec:
+        keys = {}
+        for item in spec.split(","):
+            kid, sep, secret = item.strip().partition(":")
+            if not sep or not kid or not secret:
+                raise ValueError("JWT_KEYS must look like 'kid1:secret1,kid2:secret2'")
+            keys[kid] = secret.encode("utf-8")
+        active = os.environ.get("JWT_ACTIVE_KID", next(iter(keys)))
+    else:
+        secret = os.environ.get("SECRET_KEY", "")
+        if not secret:
+            raise ValueError("FATAL: neither JWT_KEYS nor SECRET_KEY environment variable is set.")
+        keys = {"default": secret.encode("utf-8")}
+        active = "default"
+
+    legacy = os.environ.get("JWT_LEGACY_SECRET", "")
+    legacy_until = os.environ.get("JWT_LEGACY_UNTIL", "").strip()
+    return TokenCodec(
+        keys, active,
+        legacy_secret=legacy.encode("utf-8") if legacy else None,
+        legacy_until=float(legacy_until) if legacy_until else None,
+    )
+
+
+codec = load_codec_from_env()
@@ -0,0 +1,101 @@
+import sys
+import time
+import argparse
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# Closed-loop load test for the hot read endpoints.
+#
+# Steps concurrency up until p99 latency crosses --p99-ms and reports the best
+# requests/sec achieved while p99 stayed under it. Run it once against a build
+# from before the async port and once against the current build (same database,
+# same DB_POOL_* settings), then compare the "max rps @ p99" lines.
+#
+#   python bench_load.py --base-url http://127.0.0.1:8000/api --provider-id 12 --customer-id 5
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_level(url, concurrency, duration):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        nonlocal errors
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies.append(elapsed_ms)
+                else:
+                    errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": len(latencies) / duration,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def bench_endpoint(name, url, levels, duration, p99_budget):
+    print(f"\n=== {name}: {url}")
+    print(f"{'conc':>5} | {'rps':>9} | {'p50 ms':>8} | {'p99 ms':>8} | errors")
+    best = None
+    for concurrency in levels:
+        r = run_level(url, concurrency, duration)
+        print(f"{r['concurrency']:>5} | {r['rps']:>9.1f} | {r['p50']:>8.1f} | {r['p99']:>8.1f} | {r['errors']}")
+        if r["p99"] <= p99_budget and r["errors"] == 0:
+            if best is None or r["rps"] > best["rps"]:
+                best = r
+        elif best is not None:
+            break  # past the knee; higher concurrency only adds queueing
+    if best:
+        print(f"max rps @ p99 <= {p99_budget:.0f}ms: {best['rps']:.1f} (concurrency {best['concurrency']})")
+    else:
+        print(f"max rps @ p99 <= {p99_budget:.0f}ms: none (budget exceeded at every level)")
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Requests/sec at a fixed p99 for the hot read endpoints")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api")
+    parser.add_argument("--provider-id", type=int, required=True)
+    parser.add_argument("--customer-id", type=int, required=True)
+    parser.add_argument("--p99-ms", type=float, default=250.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64,128")
+    args = parser.parse_args(argv)
+
+    levels = [int(x) for x in args.levels.split(",")]
+    endpoints = {
+        "provider search": f"{args.base_url}/providers/?sort_by=rating",
+        "customer bookings": f"{args.base_url}/bookings/customer/{args.customer_id}",
+        "provider bookings": f"{args.base_url}/bookings/provider/{args.provider_id}",
+        "provider reviews": f"{args.base_url}/reviews/provider/{args.provider_id}",
+    }
+    for name, url in endpoints.items():
+        bench_endpoint(name, url, levels, args.duration, args.p99_ms)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
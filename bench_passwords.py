@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Add current dir to path for imports
+sys.path.append(str(Path(__file__).parent / "backend" / "app"))
+
+from passwords import pwd_context, hash_password, PBKDF2_ROUNDS, BCRYPT_ROUNDS
+
+# Password hashing throughput at the configured cost (PBKDF2_ROUNDS / BCRYPT_ROUNDS).
+# Reports hashes/sec on one core, then through a process pool of 1..N workers so
+# you can see how login capacity scales per core before picking a cost.
+#
+#   PBKDF2_ROUNDS=29000 python bench_passwords.py [seconds-per-run]
+
+def _hash_n(n: int) -> int:
+    for _ in range(n):
+        hash_password("correct horse battery staple")
+    return n
+
+
+def single_core_rate(seconds: float) -> float:
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        hash_password("correct horse battery staple")
+        done += 1
+    return done / (time.perf_counter() - start)
+
+
+def pool_rate(workers: int, per_worker: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_hash_n, [1] * workers))  # warm-up: spawn + import
+        start = time.perf_counter()
+        total = sum(pool.map(_hash_n, [per_worker] * workers))
+        return total / (time.perf_counter() - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    cores = os.cpu_count() or 1
+    print(f"scheme={pwd_context.default_scheme()} pbkdf2_rounds={PBKDF2_ROUNDS} bcrypt_rounds={BCRYPT_ROUNDS} cores={cores}")
+
+    base = single_core_rate(seconds)
+    print(f"single core: {base:,.1f} hashes/sec ({1000 / base:.1f} ms per hash)")
+
+    per_worker = max(1, int(base * seconds))
+    workers = 1
+    while workers <= cores:
+        rate = pool_rate(workers, per_worker)
+        print(f"pool x{workers:<3}: {rate:>10,.1f} hashes/sec | {rate / workers:>8,.1f} per core")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import List
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session, joinedload
+from pydantic import TypeAdapter
+
+# Add current dir to path for imports
+sys.path.append(str(Path(__file__).parent / "backend" / "app"))
+
+from database import engine, Base
+from models import Booking, Provider
+from schemas import BookingOut
+from serialization import orjson, dumps
+from routes.bookings import BOOKING_LIST, _booking_list
+
+# Serialization cost of a large booking list: the response_model path (ORM
+# entities with joined customer/provider/user, validated through BookingOut
+# from_attributes, JSON-encoded by the standard library) against the projection
+# path (column tuples -> dicts -> orjson). Reports ms per response and peak
+# Python memory. Seeds a scratch Postgres schema and rolls it back.
+#
+#   DATABASE_URL=postgresql://... python bench_serialization.py [--rows 10000 --repeat 5]
+
+SCHEMA = "serialization_bench"
+
+
+def seed(conn, rows):
+    conn.execute(text("""
+        INSERT INTO users (id, name, email, phone, password, role)
+        SELECT i, 'User ' || i, 'user' || i || '@example.com', '555' || i, repeat('x', 60),
+               CASE WHEN i <= 50 THEN 'provider' ELSE 'customer' END
+        FROM generate_series(1, 1050) AS i
+    """))
+    conn.execute(text("""
+        INSERT INTO providers (id, user_id, service_type, experience_years, hourly_rate, location, city, bio,
+                               background_verified, availability_status, rating, rating_sum, rating_count,
+                               total_bookings, earnings)
+        SELECT i, i, 'Plumber', 5, 400, 'City', 'city', repeat('About me. ', 50),
+               'verified', 'available', 4.5, 0, 0, 0, 0
+        FROM generate_series(1, 50) AS i
+    """))
+    conn.execute(text("""
+        INSERT INTO bookings (id, customer_id, provider_id, service_name, booking_date, booking_time,
+                              duration_hours, starts_at, ends_at, total_amount, address, notes, status)
+        SELECT i, 51, 1 + i % 50, 'Service', date '2026-01-01' + i / 10, time '08:00' + (i % 10) * interval '1 hour',
+               1, timestamp '2026-01-01 08:00' + i * interval '1 hour', timestamp '2026-01-01 09:00' + i * interval '1 hour',
+               400, 'Somewhere 12', 'Ring the bell', 'completed'
+        FROM generate_series(1, :rows) AS i
+    """), {"rows": rows})
+
+
+def response_model_path(db):
+    entities = db.execute(
+        select(Booking).options(
+            joinedload(Booking.customer),
+            joinedload(Booking.provider).joinedload(Provider.user)
+        ).where(Booking.customer_id == 51)
+    ).scalars().unique().all()
+    adapter = TypeAdapter(List[BookingOut])
+    content = adapter.dump_python(adapter.validate_python(entities, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def projection_path(db):
+    rows = db.execute(_booking_list(Booking.customer_id == 51)).all()
+    return dumps(BOOKING_LIST.build_all(rows))
+
+
+def measure(name, render, conn, repeat):
+    timings, size = [], 0
+    for _ in range(repeat):
+        db = Session(bind=conn)
+        start = time.perf_counter()
+        size = len(render(db))
+        timings.append((time.perf_counter() - start) * 1000)
+        db.close()
+    db = Session(bind=conn)
+    tracemalloc.start()
+    render(db)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    db.close()
+    timings.sort()
+    print(f"{name:<16} median {timings[len(timings) // 2]:8.1f} ms | best {timings[0]:8.1f} ms"
+          f" | peak {peak / 2**20:7.1f} MiB | {size / 1024:,.0f} KiB")
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response_model and projection serialization")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("bench_serialization.py needs a Postgres DATABASE_URL")
+        return 2
+
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        try:
+            Base.metadata.create_all(bind=conn)
+            seed(conn, args.rows)
+            print(f"{args.rows} bookings, encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+            old = measure("response_model", response_model_path, conn, args.repeat)
+            new = measure("projection", projection_path, conn, args.repeat)
+            print(f"x{old / new:.1f} faster per response")
+        finally:
+            conn.rollback()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.testclient import TestClient
+
+# Add current dir to path for imports
+sys.path.append(str(Path(__file__).parent / "backend" / "app"))
+
+import assets
+
+# Page-hit throughput of the frontend catch-all: the old per-request filesystem
+# probing (exists / is_file / retry with .html) against the startup route table.
+# Runs a mix of pages, clean URLs, assets and misses through two minimal apps
+# in-process, so no database is needed. Serves static_dist/ if it has been built.
+#
+#   python bench_static.py [--requests 5000]
+
+MIX = ["", "index.html", "about", "login.html", "dashboard", "css/style.css",
+       "js/api.js", "assets/cook.jpg", "missing-page", "js/missing.js"]
+
+
+def probing_app(static_path: Path) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/{path_name:path}")
+    async def catch_all(path_name: str):
+        if path_name == "" or path_name == "/":
+            file_path = static_path / "index.html"
+        else:
+            file_path = static_path / path_name
+            if not file_path.suffix and not file_path.exists():
+                file_path = static_path / f"{path_name}.html"
+        if file_path.exists() and file_path.is_file():
+            return FileResponse(str(file_path))
+        return JSONResponse({"error": "File not found", "path": path_name, "resolved": str(file_path)}, status_code=404)
+
+    return app
+
+
+def table_app(static_path: Path, manifest: dict) -> FastAPI:
+    app = FastAPI()
+    routes = assets.route_table(static_path, manifest)
+
+    @app.get("/{path_name:path}")
+    async def catch_all(path_name: str, request: Request):
+        static_file = routes.get(path_name.strip("/"))
+        if static_file is not None:
+            return assets.file_response(request, static_file)
+        return JSONResponse({"error": "File not found", "path": path_name}, status_code=404)
+
+    return app
+
+
+def resolve_rate(resolve, seconds: float) -> float:
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for path in MIX:
+            resolve(path)
+        done += len(MIX)
+    return done / (time.perf_counter() - start)
+
+
+def http_rate(app: FastAPI, requests: int) -> float:
+    with TestClient(app) as client:
+        for path in MIX:
+            client.get(f"/{path}")  # warm-up
+        start = time.perf_counter()
+        for i in range(requests):
+            client.get(f"/{MIX[i % len(MIX)]}")
+        return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare filesystem probing and the static route table")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=2.0, help="duration of the resolve-only runs")
+    args = parser.parse_args()
+
+    static_path, manifest = assets.load()
+    routes = assets.route_table(static_path, manifest)
+    print(f"serving {static_path} ({'built' if manifest else 'unbuilt'}), {len(routes)} routes")
+
+    def probe(path_name):
+        file_path = static_path / (path_name or "index.html")
+        if not file_path.suffix and not file_path.exists():
+            file_path = static_path / f"{path_name}.html"
+        return file_path if file_path.exists() and file_path.is_file() else None
+
+    old, new = resolve_rate(probe, args.seconds), resolve_rate(routes.get, args.seconds)
+    print(f"resolve only   probing {old:>12,.0f}/s | table {new:>12,.0f}/s | x{new / old:.1f}")
+
+    old = http_rate(probing_app(static_path), args.requests)
+    new = http_rate(table_app(static_path, manifest), args.requests)
+    print(f"full requests  probing {old:>12,.0f}/s | table {new:>12,.0f}/s | x{new / old:.1f}")
+
+    # Repeat visits: the browser revalidates and the table path answers 304 without a body
+    etags = {path: routes[path].etag for path in MIX if path in routes}
+    app = table_app(static_path, manifest)
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        for i in range(args.requests):
+            path = MIX[i % len(MIX)]
+            client.get(f"/{path}", headers={"If-None-Match": etags[path]} if path in etags else None)
+        rate = args.requests / (time.perf_counter() - start)
+    print(f"revalidations  table {rate:>12,.0f}/s (304 for every hit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import hmac
+import time
+import base64
+import hashlib
+from pathlib import Path
+
+# Add current dir to path for imports
+sys.path.append(str(Path(__file__).parent / "backend" / "app"))
+
+# tokens builds the app codec at import and refuses to start without a key
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+from tokens import TokenCodec
+
+# Micro-benchmark: tokens verified per second, previous hand-rolled verifier vs
+# the precomputed TokenCodec. Every authenticated request pays this cost once.
+#
+#   python bench_tokens.py [iterations]
+
+SECRET = "bench-secret-key"
+
+
+def _b64e(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('utf-8')
+
+def _b64d(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (4 - (len(data) % 4)))
+
+def old_create(payload: dict) -> str:
+    header_b64 = _b64e(json.dumps({"alg": "HS256", "typ": "JWT"}).encode('utf-8'))
+    payload_b64 = _b64e(json.dumps(payload).encode('utf-8'))
+    signature = hmac.new(SECRET.encode('utf-8'), f"{header_b64}.{payload_b64}".encode('utf-8'), hashlib.sha256).digest()
+    return f"{header_b64}.{payload_b64}.{_b64e(signature)}"
+
+def old_verify(token: str) -> dict:
+    header_b64, payload_b64, signature_b64 = token.split('.')
+    expected = hmac.new(SECRET.encode('utf-8'), f"{header_b64}.{payload_b64}".encode('utf-8'), hashlib.sha256).digest()
+    if not hmac.compare_digest(signature_b64, _b64e(expected)):
+        raise ValueError("bad signature")
+    payload = json.loads(_b64d(payload_b64).decode('utf-8'))
+    if "exp" in payload and payload["exp"] < time.time():
+        raise ValueError("expired")
+    return payload
+
+
+def rate(fn, arg, iterations):
+    for _ in range(min(1000, iterations)):  # warm-up
+        fn(arg)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    payload = {"sub": "customer@example.com", "uid": 42, "role": "customer", "exp": time.time() + 3600}
+
+    codec = TokenCodec({"2025-01": SECRET.encode("utf-8")}, "2025-01", legacy_secret=SECRET.encode("utf-8"))
+    new_token = codec.encode(payload)
+    legacy_token = old_create(payload)
+    assert codec.decode(new_token)["uid"] == 42
+    assert codec.decode(legacy_token)["uid"] == 42  # old tokens still verify
+
+    results = [
+        ("old verify_token", rate(old_verify, legacy_token, iterations)),
+        ("TokenCodec.decode (kid token)", rate(codec.decode, new_token, iterations)),
+        ("TokenCodec.decode (legacy token)", rate(codec.decode, legacy_token, iterations)),
+        ("old create_access_token", rate(old_create, payload, iterations)),
+        ("TokenCodec.encode", rate(codec.encode, payload, iterations)),
+    ]
+    baseline = results[0][1]
+    print(f"{'path':<34} | {'ops/sec':>12} | vs old verify")
+    print("-" * 64)
+    for name, ops in results:
+        print(f"{name:<34} | {ops:>12,.0f} | {ops / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import sys
+import time
+import uuid
+import argparse
+import statistics
+from pathlib import Path
+from sqlalchemy import event
+
+# Add current dir to path for imports
+sys.path.append(str(Path(__file__).parent / "backend" / "app"))
+
+from database import engine, SessionLocal, unit_of_work
+from models import User, Provider
+
+# Write latency of provider registration: the old two-commit path (commit the
+# User, refresh, commit the Provider) against one unit of work (a single flush
+# and commit for both rows). Talks to the database directly, so it measures the
+# transaction cost without HTTP or password hashing in the way. Rows are tagged
+# with a run id and deleted at the end.
+#
+#   DATABASE_URL=postgresql://... python bench_writes.py [--iterations 200]
+
+commits = 0
+
+
+@event.listens_for(engine, "commit")
+def _count_commit(conn):
+    global commits
+    commits += 1
+
+
+def _user(tag, i):
+    return User(name=f"Bench {i}", email=f"bench-{tag}-{i}@example.invalid", phone="0000000000",
+                password="x", role="provider")
+
+
+def _profile(**kwargs):
+    return Provider(service_type="Plumber", experience_years=3, hourly_rate=300.0,
+                    location="Bench City", address="Nowhere", bio="", **kwargs)
+
+
+def two_commits(db, tag, i):
+    user = _user(tag, i)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    provider = _profile(user_id=user.id)
+    db.add(provider)
+    db.commit()
+    db.refresh(provider)
+
+
+def one_unit_of_work(db, tag, i):
+    provider = _profile(user=_user(tag, i))
+    with unit_of_work(db):
+        db.add(provider)
+    db.refresh(provider)
+
+
+def run(name, write, iterations):
+    global commits
+    tag = uuid.uuid4().hex[:12]
+    timings = []
+    commits = 0
+    for i in range(iterations):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            write(db, tag, i)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    timings.sort()
+    print(f"{name:<18} mean {statistics.mean(timings):7.2f} ms | p50 {timings[len(timings) // 2]:7.2f} ms"
+          f" | p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms | {commits / iterations:.1f} commits/op")
+    return tag
+
+
+def cleanup(tags):
+    db = SessionLocal()
+    try:
+        with unit_of_work(db):
+            for tag in tags:
+                ids = db.query(User.id).filter(User.email.like(f"bench-{tag}-%"))
+                db.query(Provider).filter(Provider.user_id.in_(ids)).delete(synchronize_session=False)
+                db.query(User).filter(User.email.like(f"bench-{tag}-%")).delete(synchronize_session=False)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two-commit and single unit-of-work write latency")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.iterations} provider registrations per variant ({engine.dialect.name})")
+    tags = []
+    try:
+        # Warm the pool and the statement cache so neither variant pays for it
+        tags.append(run("warm-up", one_unit_of_work, min(10, args.iterations)))
+        tags.append(run("before: 2 commits", two_commits, args.iterations))
+        tags.append(run("after: 1 commit", one_unit_of_work, args.iterations))
+    finally:
+        cleanup(tags)
+
+
+if __name__ == "__main__":
+    main()
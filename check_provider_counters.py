@@ -0,0 +1,88 @@
+import sys
+import random
+import argparse
+import requests
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrency check for the provider running totals (total_bookings, earnings).
+#
+# Fires --bookings parallel bookings at one provider (each in its own hour slot),
+# then completes every one of them twice in parallel, and checks that the
+# provider's total_bookings and earnings moved by exactly the expected amounts:
+# no lost increments, no double payouts. Writes real bookings, so point it at a
+# staging database; the slots are placed on random far-future days.
+#
+#   python check_provider_counters.py --base-url http://127.0.0.1:8000/api --provider-id 12 --customer-id 5
+
+COMMISSION_RATE = 0.15
+
+
+def get_provider(base_url, provider_id):
+    response = requests.get(f"{base_url}/providers/{provider_id}", timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+def create_booking(base_url, provider_id, customer_id, day, hour):
+    payload = {
+        "provider_id": provider_id,
+        "service_name": "Counter check",
+        "booking_date": day.isoformat(),
+        "booking_time": f"{hour:02d}:00:00",
+        "duration_hours": 1,
+        "address": "Load test",
+    }
+    response = requests.post(f"{base_url}/bookings/", params={"customer_id": customer_id}, json=payload, timeout=60)
+    return response.json() if response.status_code == 201 else None
+
+
+def complete_booking(base_url, booking_id):
+    response = requests.patch(f"{base_url}/bookings/{booking_id}/status", params={"new_status": "completed"}, timeout=60)
+    return response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check provider counters under concurrent bookings")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api")
+    parser.add_argument("--provider-id", type=int, required=True, help="a verified provider")
+    parser.add_argument("--customer-id", type=int, required=True)
+    parser.add_argument("--bookings", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    first_day = date(2090, 1, 1) + timedelta(days=random.randint(0, 3650))
+    slots = [(first_day + timedelta(days=i // 10), 8 + i % 10) for i in range(args.bookings)]
+
+    before = get_provider(args.base_url, args.provider_id)
+    print(f"before: total_bookings={before['total_bookings']} earnings={before['earnings']:.2f}")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        created = [b for b in pool.map(
+            lambda slot: create_booking(args.base_url, args.provider_id, args.customer_id, *slot), slots
+        ) if b]
+    print(f"created {len(created)}/{args.bookings} bookings")
+
+    # Every booking is completed twice at once; only one of each pair may pay out
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        codes = list(pool.map(lambda b: complete_booking(args.base_url, b["id"]), created * 2))
+    print(f"completion calls: {sum(1 for c in codes if c == 200)}/{len(codes)} returned 200")
+
+    after = get_provider(args.base_url, args.provider_id)
+    print(f"after:  total_bookings={after['total_bookings']} earnings={after['earnings']:.2f}")
+
+    expected_bookings = before["total_bookings"] + len(created)
+    expected_earnings = before["earnings"] + sum((b["total_amount"] or 0.0) * (1 - COMMISSION_RATE) for b in created)
+    ok = True
+    if after["total_bookings"] != expected_bookings:
+        print(f"FAIL total_bookings: expected {expected_bookings}, got {after['total_bookings']}")
+        ok = False
+    if abs(after["earnings"] - expected_earnings) > 0.01:
+        print(f"FAIL earnings: expected {expected_earnings:.2f}, got {after['earnings']:.2f}")
+        ok = False
+    print("OK: no lost updates" if ok else "Counters drifted")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
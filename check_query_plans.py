@@ -0,0 +1,192 @@
+import sys
+import json
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+from sqlalchemy import select, exists, and_, text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import asyncpg as pg_asyncpg
+
+# Add current dir to path for imports
+sys.path.append(str(Path(__file__).parent / "backend" / "app"))
+
+from database import engine, Base
+from models import User, Provider, Booking, Review, Complaint
+from pagination import page_query, encode_cursor, DEFAULT_PAGE_SIZE
+from routes.providers import _provider_listing
+from routes.bookings import _booking_list
+from routes.reviews import _review_list
+from routes.admin import _users_listing, _bookings_listing, USER_SORT_KEYS, BOOKING_SORT_KEYS
+
+# Query-plan regression check for the hot queries in routes/.
+#
+# Builds the schema in a scratch Postgres schema, seeds a realistic dataset,
+# ANALYZEs it and EXPLAINs each query twice: with the values inlined, and as a
+# prepared statement forced onto a generic plan with asyncpg-style bound
+# parameters ($1, $2, ...), which is what the async read paths send. Exits 1 if
+# any plan has a sequential scan on one of the large tables, i.e. an index it
+# relies on went missing or stopped matching the query. The listing statements
+# come from the route code itself (_provider_listing, _booking_list,
+# _review_list, the admin listings through pagination.page_query), so the check
+# follows the routes. Everything runs in one transaction that is rolled back.
+#
+#   DATABASE_URL=postgresql://... python check_query_plans.py [--providers 2000 --bookings 60000]
+
+SCHEMA = "query_plan_check"
+WATCHED_TABLES = {"users", "providers", "bookings", "provider_slots", "reviews", "complaints"}
+
+
+def hot_queries(session):
+    day = date(2026, 3, 14)
+    start, end = datetime(2026, 3, 14, 10), datetime(2026, 3, 14, 12)
+
+    def admin_page(listing, sort_keys, id_col, sort=None):
+        query, filters = listing
+        return page_query(query.filter(*filters), sort_keys, sort, id_col, None, DEFAULT_PAGE_SIZE)[0].statement
+
+    return {
+        "providers: default listing (rating sort)": _provider_listing()[0],
+        "providers: listing, next page": _provider_listing(cursor=encode_cursor("rating", 2.5, 1500))[0],
+        "providers: by service type": _provider_listing(service_type="Plumber")[0],
+        "providers: by city": _provider_listing(location="City 7")[0],
+        "providers: free on date": _provider_listing(booking_date=day)[0],
+        "providers: profile by user": select(Provider).where(Provider.user_id == 1234),
+        "bookings: customer history": _booking_list(Booking.customer_id == 2345),
+        "bookings: provider schedule": _booking_list(Booking.provider_id == 321),
+        "bookings: by id": _booking_list(Booking.id == 4567),
+        "bookings: overlap check": select(exists().where(and_(
+            Booking.provider_id == 321, Booking.status.in_(("pending", "confirmed")),
+            Booking.starts_at < end, Booking.ends_at > start,
+        ))),
+        "admin: bookings by status": admin_page(
+            _bookings_listing(session, status="reschedule_requested"), BOOKING_SORT_KEYS, Booking.id),
+        "admin: customer's upcoming bookings": admin_page(
+            _bookings_listing(session, customer_id=2345, sort="upcoming"), BOOKING_SORT_KEYS, Booking.id, "upcoming"),
+        "admin: users by role": admin_page(_users_listing(session, role="provider"), USER_SORT_KEYS, User.id),
+        "reviews: for provider": _review_list(Review.provider_id == 321),
+        "reviews: existing for booking": select(Review).where(Review.booking_id == 4567),
+        "reviews: by customer": _review_list(Review.customer_id == 2345),
+        "complaints: by customer": select(Complaint).where(Complaint.customer_id == 2345),
+        "complaints: for booking": select(Complaint).where(Complaint.booking_id == 4567),
+        "users: by email": select(User).where(User.email == "user1234@example.com"),
+    }
+
+
+def explain_inlined(conn, query):
+    compiled = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+
+
+def explain_generic(conn, query):
+    # Compiled the way the asyncpg engine sends it; the generic plan can't peek at the values
+    compiled = query.compile(dialect=pg_asyncpg.dialect(), compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    conn.exec_driver_sql(f"PREPARE plan_check AS {compiled}")
+    try:
+        placeholders = f"({', '.join(['%s'] * len(params))})" if params else ""
+        return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) EXECUTE plan_check{placeholders}", params).scalar()
+    finally:
+        conn.exec_driver_sql("DEALLOCATE plan_check")
+
+
+def seed(conn, providers, customers, bookings):
+    users = providers + customers
+    conn.execute(text("""
+        INSERT INTO users (id, name, email, phone, password, role)
+        SELECT i, 'User ' || i, 'user' || i || '@example.com', '555' || i, 'x',
+               CASE WHEN i <= :providers THEN 'provider' ELSE 'customer' END
+        FROM generate_series(1, :users) AS i
+    """), {"providers": providers, "users": users})
+    conn.execute(text("""
+        INSERT INTO providers (id, user_id, service_type, experience_years, hourly_rate, location, city,
+                               background_verified, availability_status, rating, rating_sum, rating_count,
+                               total_bookings, earnings)
+        SELECT i, i, (ARRAY['Plumber','Electrician','Cleaner','Carpenter','Painter','Gardener'])[1 + i % 6],
+               i % 20, 200 + i % 800, 'City ' || (i % 40), 'city ' || (i % 40),
+               CASE WHEN i % 5 = 0 THEN 'pending' ELSE 'verified' END, 'available',
+               (i % 50) / 10.0, 0, 0, 0, 0
+        FROM generate_series(1, :providers) AS i
+    """), {"providers": providers})
+    conn.execute(text("""
+        INSERT INTO bookings (id, customer_id, provider_id, service_name, booking_date, booking_time,
+                              duration_hours, starts_at, ends_at, total_amount, address, status)
+        SELECT i, :providers + 1 + i % :customers, 1 + i % :providers, 'Service',
+               s::date, s::time, 1, s, s + interval '1 hour', 500, 'Somewhere',
+               CASE WHEN i % 97 = 0 THEN 'reschedule_requested'
+                    ELSE (ARRAY['completed','completed','completed','cancelled','pending','confirmed'])[1 + i % 6] END
+        FROM generate_series(1, :bookings) AS i,
+             LATERAL (SELECT timestamp '2026-01-01 08:00' + (i % 365) * interval '1 day'
+                                                        + (i % 10) * interval '1 hour' AS s) AS t
+    """), {"providers": providers, "customers": customers, "bookings": bookings})
+    conn.execute(text("""
+        INSERT INTO provider_slots (provider_id, booking_id, slot_date, slot_start)
+        SELECT provider_id, id, starts_at::date, starts_at FROM bookings WHERE status IN ('pending', 'confirmed')
+    """))
+    conn.execute(text("""
+        INSERT INTO reviews (booking_id, provider_id, customer_id, rating, comment)
+        SELECT id, provider_id, customer_id, 1 + id % 5, 'ok' FROM bookings WHERE status = 'completed'
+    """))
+    conn.execute(text("""
+        INSERT INTO complaints (booking_id, customer_id, subject, description, status)
+        SELECT id, customer_id, 'Issue', 'Details', 'pending' FROM bookings WHERE id % 20 = 0
+    """))
+    conn.execute(text("ANALYZE " + ", ".join(sorted(WATCHED_TABLES))))
+
+
+def seq_scans(plan, found=None):
+    found = [] if found is None else found
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in WATCHED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        seq_scans(child, found)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query plans a sequential scan")
+    parser.add_argument("--providers", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--bookings", type=int, default=60000)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("check_query_plans.py needs a Postgres DATABASE_URL")
+        return 2
+
+    failures = []
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        try:
+            Base.metadata.create_all(bind=conn)
+            print(f"Seeding {args.providers} providers, {args.customers} customers, {args.bookings} bookings...")
+            seed(conn, args.providers, args.customers, args.bookings)
+
+            conn.exec_driver_sql("SET LOCAL plan_cache_mode = force_generic_plan")
+            session = Session(bind=conn)
+            for name, query in hot_queries(session).items():
+                for mode, explain in (("inlined", explain_inlined), ("bound", explain_generic)):
+                    row = explain(conn, query)
+                    plan = (json.loads(row) if isinstance(row, str) else row)[0]["Plan"]
+                    scans = seq_scans(plan)
+                    label = f"{name} [{mode}]"
+                    print(f"{'FAIL' if scans else 'ok  '} {label}" + (f"  (seq scan on {', '.join(scans)})" if scans else ""))
+                    if args.verbose or scans:
+                        print(json.dumps(plan, indent=2))
+                    if scans:
+                        failures.append(label)
+        finally:
+            # Nothing was committed, so this discards the scratch schema and its data
+            conn.rollback()
+
+    if failures:
+        print(f"{len(failures)} hot queries fell back to a sequential scan")
+        return 1
+    print("All hot queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,9 @@ echo Starting All In One Server...
 echo PYTHONPATH: %PYTHONPATH%
 echo ====================================================
 
+REM Apply schema migrations and seed the admin account (no longer done on import)
+".\venv\Scripts\python.exe" -m app.migrations all
+
 REM Run uvicorn using the virtual environment's python directly
 ".\venv\Scripts\python.exe" -m uvicorn app.main:app --reload --host 127.0.0.1 --port 8000
 